@@ -1,13 +1,24 @@
+import csv
+import io
 import logging
 import re
 import json
+import sys
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
-from pathlib import Path
-from typing import Any, Dict, List, Tuple, Optional
+from itertools import compress, islice, repeat
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Optional
 
+import numpy as np
 import pandas as pd
-from influxdb_client import Point, WritePrecision
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+except ImportError:  # pyarrow est optionnel : repli sur pandas.read_csv
+    pa = None
 
 logger = logging.getLogger("tsv_parser")
 
@@ -20,6 +31,27 @@ class FileFormat(str, Enum):
     MV_T302_V003 = "MV_T302_V003"
 
 
+_UTC = timezone.utc
+
+# Nombre de valeurs invalides citées en exemple dans les warnings
+_LOG_SAMPLES = 3
+
+# Nombre de lignes de données traitées par bloc (borne la mémoire des
+# DataFrames / matrices intermédiaires sur les gros fichiers)
+DATA_CHUNK_ROWS = 100_000
+
+# Taille des blocs d'octets lus à la fois par le lecteur pyarrow (~20 000
+# lignes de mesures) : borne la mémoire des tables Arrow intermédiaires
+DATA_BLOCK_SIZE = 1 << 20
+
+# Une ligne non vide de la zone de données, avec sa fin de ligne
+_DATA_LINE_RE = re.compile(rb"[^\r\n]+(?:\r\n|\r|\n)?")
+
+# Format nominal "DD/MM/YY HH:MM:SS" (chiffres uniquement, zéros de tête)
+_TIMESTAMP_RE = re.compile(r"([0-9]{2})/([0-9]{2})/([0-9]{2}) ([0-9]{2}):([0-9]{2}):([0-9]{2})")
+_TIMESTAMP_FORMAT = "%d/%m/%y %H:%M:%S"
+
+
 def parse_timestamp(timestamp_str: str) -> Optional[datetime]:
     """
     Essaie de parser un timestamp issu du TSV en datetime.
@@ -36,6 +68,9 @@ def parse_timestamp(timestamp_str: str) -> Optional[datetime]:
       (Les informations de fuseau éventuelles dans le header JSON V003 ne sont
        pas encore exploitées.)
 
+    Le cas nominal est décodé directement (regex + int), strptime n'est
+    utilisé qu'en repli pour les variantes (valeurs sans zéro de tête...).
+
     Retourne:
         - un datetime (UTC) si le parsing réussit
         - None sinon
@@ -44,22 +79,478 @@ def parse_timestamp(timestamp_str: str) -> Optional[datetime]:
     if not ts:
         return None
 
-    fmt = "%d/%m/%y %H:%M:%S"
+    m = _TIMESTAMP_RE.fullmatch(ts)
+    if m is not None:
+        day, month, year, hour, minute, second = map(int, m.groups())
+        # Même pivot que strptime("%y") : 69-99 -> 19xx, 00-68 -> 20xx
+        year += 1900 if year >= 69 else 2000
+        try:
+            return datetime(year, month, day, hour, minute, second, tzinfo=_UTC)
+        except ValueError:
+            return None
+
+    # Sans séparateur de date, strptime échouerait forcément : on évite de
+    # construire une ValueError (lignes START_DATA, header JSON V003...)
+    if "/" not in ts:
+        return None
 
     try:
-        dt = datetime.strptime(ts, fmt)
+        dt = datetime.strptime(ts, _TIMESTAMP_FORMAT)
         # On attache explicitement le fuseau UTC
-        return dt.replace(tzinfo=timezone.utc)
+        return dt.replace(tzinfo=_UTC)
     except ValueError:
         return None
 
 
+# ---------------------------------------------------------------------------
+# Line protocol InfluxDB
+# ---------------------------------------------------------------------------
+
+# Mêmes règles d'échappement que influxdb_client (measurement / clés / tags)
+_ESCAPE_MEASUREMENT = str.maketrans({",": r"\,", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r"})
+_ESCAPE_KEY = str.maketrans({",": r"\,", "=": r"\=", " ": r"\ ", "\n": r"\n", "\t": r"\t", "\r": r"\r"})
+
+
+def _escape_key(value: Any) -> str:
+    """
+    Échappe une clé ou une valeur de tag pour le line protocol.
+    """
+    return str(value).translate(_ESCAPE_KEY)
+
+
+def _format_floats(values: List[float]) -> List[str]:
+    """
+    Formate une colonne de floats comme le fait influxdb_client (repr, sans
+    ".0" final). Traite toute une colonne d'un coup : repr (via map) et
+    removesuffix sont des appels C, sans fonction Python par valeur.
+    """
+    return [s.removesuffix(".0") for s in map(repr, values)]
+
+
+def _timestamp_suffixes(epochs: np.ndarray) -> Any:
+    """
+    Fin de ligne " <epoch>" de chaque ligne d'un bloc, partagée par tous les
+    canaux : tableau Arrow si pyarrow est installé, sinon liste de str.
+    """
+    if pa is not None:
+        return pc.binary_join_element_wise("", pc.cast(pa.array(epochs), pa.string()), " ")
+    return [f" {ts}" for ts in epochs.tolist()]
+
+
+def _format_lines(prefix: str, values: np.ndarray, ok: np.ndarray, ts_suffixes: Any) -> List[str]:
+    """
+    Lignes de line protocol d'un canal sur un bloc : préfixe du canal, valeur
+    et timestamp des lignes retenues par le masque `ok` (valeurs finies).
+
+    Avec pyarrow, formatage des floats et concaténation sont faits par les
+    kernels Arrow (C++), sans objet Python intermédiaire par valeur. Le cast
+    double -> string d'Arrow donne les mêmes chiffres que repr, mais passe en
+    notation exponentielle plus tôt : hors de [1e-4, 1e10) (zéro excepté),
+    les valeurs sont formatées par repr.
+    """
+    if pa is None:
+        return [
+            f"{prefix}{value}{suffix}"
+            for value, suffix in zip(_format_floats(values.tolist()), compress(ts_suffixes, ok))
+        ]
+
+    text = pc.cast(pa.array(values), pa.string())
+    magnitude = np.abs(values)
+    exotic = ~(((magnitude >= 1e-4) & (magnitude < 1e10)) | (magnitude == 0))
+    if exotic.any():
+        text = pc.replace_with_mask(
+            text, pa.array(exotic), pa.array(_format_floats(values[exotic].tolist()), pa.string())
+        )
+    lines = pc.binary_join_element_wise(prefix, text, ts_suffixes.filter(pa.array(ok)), "")
+    return lines.to_numpy(zero_copy_only=False).tolist()
+
+
+def _channel_line_prefix(measurement: str, mapping: Dict[str, Any], campaign: str) -> str:
+    """
+    Construit, une fois par canal, le début de ligne commun à tous ses points :
+
+        electrical,campaign=...,channel_id=...,... M02001171_U1_V=
+
+    Les tags sont triés par clé (ordre recommandé par InfluxDB) et les tags
+    vides ou None sont omis, comme avec Point.
+    """
+    tags = {
+        "campaign": campaign,                              # campagne de mesure
+        "channel_id": mapping["channel_id"],               # M02001171_Ch1
+        "channel_unit": mapping["unit"],                   # V, W, Wa
+        "channel_label": mapping["channel_label"],         # U1, Ch1, ...
+        "channel_name": mapping["channel_name"],           # Ph 1, Voie1, ...
+        "device": mapping["device"],                       # MV2
+        "device_type": mapping["device_type"],             # master/slave
+        "device_subtype": mapping["device_subtype"],       # null/tri/mono
+        "device_master_sn": mapping["device_master_sn"],   # 02001171
+        "device_sn": mapping["device_sn"],                 # 020011201
+        # NE PLUS ajouter file_name comme tag pour éviter la forte cardinalité
+    }
+    tag_str = "".join(
+        f",{key}={_escape_key(val)}"
+        for key, val in sorted(tags.items())
+        if val is not None and val != ""
+    )
+    # Field = "<channel_id>_<unit>"
+    field_key = _escape_key(f"{mapping['channel_id']}_{mapping['unit']}")
+    return f"{measurement.translate(_ESCAPE_MEASUREMENT)}{tag_str} {field_key}="
+
+
+@dataclass
+class ChannelArrays:
+    """
+    Vue « par colonnes » des channel_mappings d'un fichier, construite une
+    fois avant le parsing : listes parallèles indexées par position de canal
+    (au lieu d'une liste de dicts relue à chaque bloc).
+    """
+    column_idx: np.ndarray      # int32[n] : colonne du TSV
+    channel_id: List[str]       # M02001171_U1, ...
+    prefix: List[str]           # début de ligne de line protocol (tags + field)
+
+    @classmethod
+    def from_mappings(cls, channel_mappings: List[Dict], measurement: str, campaign: str) -> "ChannelArrays":
+        return cls(
+            column_idx=np.array([m["column_idx"] for m in channel_mappings], dtype=np.int32),
+            channel_id=[m["channel_id"] for m in channel_mappings],
+            prefix=[_channel_line_prefix(measurement, m, campaign) for m in channel_mappings],
+        )
+
+
+_END_DATA_RE = re.compile(rb"^END_DATA\r?$", re.MULTILINE)
+
+
+def _read_line(content: bytes, pos: int) -> Tuple[str, int]:
+    """
+    Ligne de `content` commençant à `pos` (décodée, sans espaces autour) et
+    position du début de la ligne suivante.
+    """
+    end = content.find(b"\n", pos)
+    if end < 0:
+        end = len(content)
+    return content[pos:end].decode("utf-8").strip(), min(end + 1, len(content))
+
+
+@dataclass
+class TSVFile:
+    """
+    Fichier TSV lu en une seule fois (un open, un read) : lignes de header
+    découpées, zone des lignes de données laissée en octets et passée telle
+    quelle au lecteur CSV (cf. _iter_tsv_frames), sans seconde lecture.
+
+    Gère les fichiers "classiques" (V002) et ceux avec START_HEADER/END_HEADER
+    + START_DATA/END_DATA (V003).
+    """
+    line1: List[str]                                # SN des devices
+    line2: List[str]                                # format + noms de canaux
+    data: memoryview                                # lignes de données
+    header_meta: Optional[Dict[str, Any]] = None    # JSON du header V003
+    header: bytes = b""                             # octets avant les données
+
+    @property
+    def file_format(self) -> str:
+        return self.line2[0]
+
+    @classmethod
+    def read(cls, tsv_file: str) -> "TSVFile":
+        with open(tsv_file, "rb") as f:
+            content = f.read()
+
+        header_meta: Optional[Dict[str, Any]] = None
+        first, pos = _read_line(content, 0)
+        if first == "START_HEADER":
+            header_meta = {}
+            # On lit le header JSON puis on avance jusqu'à START_DATA
+            while pos < len(content):
+                line, pos = _read_line(content, pos)
+                if line == "START_DATA":
+                    break
+                if line and line != "END_HEADER" and not header_meta:
+                    try:
+                        header_meta = json.loads(line)
+                    except ValueError as e:
+                        logger.warning("Impossible de parser le header JSON V003: %s", e)
+            # Les deux prochaines lignes sont line1 et line2
+            line1, pos = _read_line(content, pos)
+            line2, pos = _read_line(content, pos)
+            end_data = _END_DATA_RE.search(content, pos)
+            end = end_data.start() if end_data is not None else len(content)
+        else:
+            line1 = first
+            line2, pos = _read_line(content, pos)
+            end = len(content)
+
+        return cls(
+            line1=line1.split("\t"),
+            line2=line2.split("\t"),
+            data=memoryview(content)[pos:end],
+            header_meta=header_meta,
+            header=content[:pos],
+        )
+
+
+# Clé réservée d'un bloc : nombre de cellules de chaque ligne, présente
+# uniquement pour les blocs lus ligne à ligne (cf. _iter_ragged_frames)
+_ROW_WIDTHS = -1
+
+
+def _iter_ragged_frames(data: memoryview, width: int, chunk_rows: int) -> Iterator[Dict[int, np.ndarray]]:
+    """
+    Lecture ligne à ligne, tolérante aux lignes de longueur variable (comme
+    l'ancien parsing V003) : les cellules au-delà des `width` colonnes du
+    header sont ignorées, les cellules manquantes d'une ligne courte sont
+    repérées via _ROW_WIDTHS (ni points ni valeurs invalides). Les lignes
+    vides sont ignorées, comme par le lecteur pyarrow.
+    """
+    rows = [
+        line.rstrip("\r").split("\t")[:width]
+        for line in bytes(data).decode("utf-8").split("\n")
+        if line.strip()
+    ]
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        frame = {_ROW_WIDTHS: np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))}
+        for col in range(width):
+            frame[col] = np.array([row[col] if col < len(row) else None for row in chunk], dtype=object)
+        yield frame
+
+
+def _iter_tsv_frames(
+    data: memoryview,
+    chunk_rows: Optional[int] = None,
+    ragged_width: Optional[int] = None,
+) -> Iterator[Dict[int, np.ndarray]]:
+    """
+    Lit la zone de données d'un TSV (cf. TSVFile) en blocs d'au plus
+    chunk_rows lignes : {index de colonne (0..n): tableau NumPy}.
+
+    Utilise le lecteur CSV de pyarrow (C++, colonnaire) s'il est installé,
+    en flux sur les octets déjà lus (blocs de DATA_BLOCK_SIZE octets) : la
+    colonne 0 (timestamps) reste en texte, les autres sont typées par pyarrow
+    d'après le premier bloc, et chaque colonne Arrow est convertie directement
+    en tableau NumPy (float64, NaN pour les cellules vides), sans passer par
+    un DataFrame. Si pyarrow refuse un bloc (lignes de longueurs différentes,
+    cellule non numérique dans une colonne typée...), la suite des données, à
+    partir de ce bloc, est lue par pandas.read_csv (chunksize), plus tolérant.
+    Une zone de données vide ne produit aucun bloc.
+    Les guillemets ne sont pas interprétés (le format n'en a pas) : un " isolé
+    dans une cellule ne fusionne pas les lignes suivantes.
+
+    Si ragged_width est fourni (nombre de colonnes du header, cf. V003), le
+    repli est la lecture ligne à ligne de _iter_ragged_frames, qui accepte
+    aussi les lignes plus longues que le header.
+
+    Les colonnes de mesure ne sont volontairement pas typées à la lecture :
+    float32 changerait les valeurs écrites (247.2 -> 247.1999969), et un
+    float64 imposé ferait échouer tout le fichier sur une seule cellule non
+    numérique, là où l'inférence la laisse en texte (comptée invalide par
+    _to_value_matrix). La lecture pèse peu (~5 % du parsing).
+    """
+    chunk_rows = chunk_rows or DATA_CHUNK_ROWS
+    if pa is not None:
+        nb_rows = 0
+        try:
+            reader = pa_csv.open_csv(
+                pa.BufferReader(pa.py_buffer(data)),
+                read_options=pa_csv.ReadOptions(
+                    autogenerate_column_names=True, block_size=DATA_BLOCK_SIZE
+                ),
+                parse_options=pa_csv.ParseOptions(delimiter="\t", quote_char=False),
+                convert_options=pa_csv.ConvertOptions(column_types={"f0": pa.string()}),
+            )
+            for batch in reader:
+                for start in range(0, batch.num_rows, chunk_rows):
+                    columns = batch.slice(start, chunk_rows).columns
+                    yield {i: col.to_numpy(zero_copy_only=False) for i, col in enumerate(columns)}
+                nb_rows += batch.num_rows
+            return
+        except pa.ArrowInvalid as e:
+            logger.debug("pyarrow n'a pas pu lire les données (%s), repli ligne à ligne / pandas", e)
+            data = data[_skip_data_lines(data, nb_rows):]
+
+    if ragged_width is not None:
+        yield from _iter_ragged_frames(data, ragged_width, chunk_rows)
+        return
+
+    try:
+        reader = pd.read_csv(
+            io.BytesIO(data), sep="\t", header=None, chunksize=chunk_rows,
+            float_precision="round_trip", quoting=csv.QUOTE_NONE,
+        )
+    except pd.errors.EmptyDataError:
+        return
+    for df in reader:
+        yield {col: df[col].to_numpy() for col in df.columns}
+
+
+def _skip_data_lines(data: memoryview, nb_lines: int) -> int:
+    """
+    Position (en octets) qui suit les nb_lines premières lignes non vides de
+    `data` : les lignes déjà restituées par le lecteur pyarrow (qui ignore
+    les lignes vides) avant son repli.
+    """
+    if not nb_lines:
+        return 0
+    last = next(islice(_DATA_LINE_RE.finditer(data), nb_lines - 1, None), None)
+    return last.end() if last is not None else len(data)
+
+
+# Positions des chiffres et des séparateurs dans "DD/MM/YY HH:MM:SS"
+_TIMESTAMP_DIGITS = np.array([0, 1, 3, 4, 6, 7, 9, 10, 12, 13, 15, 16])
+_TIMESTAMP_SEPARATORS = {2: "/", 5: "/", 8: " ", 11: ":", 14: ":"}
+_TIMESTAMP_LEN = 17
+
+
+def _to_epoch_seconds_fixed(raw: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Décode en NumPy les timestamps au format nominal "DD/MM/YY HH:MM:SS"
+    (même règle que la regex de parse_timestamp), sans objet Python par ligne.
+
+    Les textes sont vus comme une matrice de code points (une ligne par
+    timestamp) : chiffres, séparateurs et bornes des champs (dont le nombre
+    de jours du mois) sont vérifiés colonne par colonne. Les autres lignes
+    sont laissées à pandas par l'appelant.
+
+    Retourne (epochs, exact).
+    """
+    n = len(raw)
+    # Une colonne de plus que le format : un texte plus long y est détecté
+    codes = np.array(raw, dtype=f"U{_TIMESTAMP_LEN + 1}").view(np.uint32).reshape(n, _TIMESTAMP_LEN + 1)
+    digits = codes[:, _TIMESTAMP_DIGITS] - ord("0")
+    exact = (digits <= 9).all(axis=1) & (codes[:, _TIMESTAMP_LEN] == 0)
+    for pos, sep in _TIMESTAMP_SEPARATORS.items():
+        exact &= codes[:, pos] == ord(sep)
+
+    digits = digits.astype(np.int64)
+    day, month, year, hour, minute, second = (digits[:, 2 * k] * 10 + digits[:, 2 * k + 1] for k in range(6))
+    # Même pivot que strptime("%y") : 69-99 -> 19xx, 00-68 -> 20xx
+    year += np.where(year >= 69, 1900, 2000)
+    exact &= (month >= 1) & (month <= 12) & (day >= 1) & (hour < 24) & (minute < 60) & (second < 60)
+
+    months = np.where(exact, (year - 1970) * 12 + month - 1, 0)
+    month_start = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    next_month_start = (months + 1).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    exact &= day <= next_month_start - month_start
+
+    # Heures du fichier considérées comme UTC (cf. parse_timestamp)
+    epochs = (month_start + day - 1) * 86400 + hour * 3600 + minute * 60 + second
+    return np.where(exact, epochs, 0), exact
+
+
+def _to_epoch_seconds(timestamps) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convertit la colonne des timestamps en epoch secondes UTC.
+
+    Le parsing est fait en une fois sur toute la colonne : décodage NumPy
+    du format nominal (cf. _to_epoch_seconds_fixed), puis pd.to_datetime
+    (même format que parse_timestamp) pour les seules lignes restantes
+    (espaces autour, champs sans zéro de tête...).
+
+    Retourne:
+        (epochs: int64[n], valid: bool[n])
+    """
+    raw = np.asarray(timestamps, dtype=object)
+    epochs = np.zeros(len(raw), dtype=np.int64)
+    valid = np.zeros(len(raw), dtype=bool)
+
+    if len(raw):
+        fixed_epochs, exact = _to_epoch_seconds_fixed(raw)
+        epochs[exact] = fixed_epochs[exact]
+        valid |= exact
+
+    todo = ~valid
+    if todo.any():
+        text = pd.Series(raw[todo]).astype(str).str.strip()
+        parsed = pd.to_datetime(text, format=_TIMESTAMP_FORMAT, errors="coerce")
+        # pd.to_datetime reporte les secondes 60/61 sur la minute suivante,
+        # là où parse_timestamp (datetime) les refuse
+        ok = (parsed.notna() & ~text.str.endswith((":60", ":61"))).to_numpy()
+        idx = np.flatnonzero(todo)[ok]
+        # Heures du fichier considérées comme UTC (cf. parse_timestamp)
+        epochs[idx] = parsed.to_numpy()[ok].astype("datetime64[s]").astype(np.int64)
+        valid[idx] = True
+
+    return epochs, valid
+
+
+def _to_value_matrix(frame: Dict[int, np.ndarray], column_idxs: np.ndarray) -> np.ndarray:
+    """
+    Convertit les colonnes de mesure en une matrice float64 (nb_rows, nb_channels).
+
+    La conversion se fait colonne par colonne et non cellule par cellule :
+    une valeur absente ou non numérique devient NaN et est comptée comme
+    invalide par l'appelant.
+    """
+    values = np.full((_frame_len(frame), len(column_idxs)), np.nan, dtype=np.float64)
+    for j, col_idx in enumerate(column_idxs.tolist()):
+        if col_idx in frame:
+            column = frame[col_idx]
+            # Colonnes déjà numériques (cas nominal) copiées telles quelles
+            if column.dtype.kind not in "fiu":
+                column = _text_to_float(column)
+            values[:, j] = column
+    return values
+
+
+def _text_to_float(column: np.ndarray) -> np.ndarray:
+    """
+    Convertit une colonne texte en float64 avec float() (arrondi exact, comme
+    le parsing d'origine) ; pd.to_numeric perd le dernier chiffre des valeurs
+    à 17 chiffres significatifs. Une cellule non numérique devient NaN.
+    """
+    try:
+        return column.astype(np.float64)
+    except (TypeError, ValueError):
+        pass
+    values = np.full(len(column), np.nan, dtype=np.float64)
+    for i, cell in enumerate(column.tolist()):
+        try:
+            values[i] = float(cell)
+        except (TypeError, ValueError):
+            pass
+    return values
+
+
+def _frame_len(frame: Dict[int, np.ndarray]) -> int:
+    """
+    Nombre de lignes d'un bloc de colonnes (cf. _iter_tsv_frames).
+    """
+    return len(next(iter(frame.values()))) if frame else 0
+
+
+# "<nom canal> <unité>" : l'unité est ce qui suit le dernier espace
+_CHANNEL_INFO_RE = re.compile(r"(.*) ([^ ]*)", re.DOTALL)
+
+
+def _split_channel_info(channel_info: str) -> Tuple[str, str]:
+    """
+    Découpe un libellé de canal de la 2ème ligne du header en (nom, unité),
+    sans espaces autour. Sans espace, tout le libellé est le nom et l'unité
+    est vide (même découpage que channel_info.rsplit(" ", 1)).
+    """
+    m = _CHANNEL_INFO_RE.fullmatch(channel_info)
+    if m is None:
+        return channel_info.strip(), ""
+    channel_name, unit = m.groups()
+    return channel_name.strip(), unit.strip()
+
+
+# Mappings de canaux déjà construits, par (classe de parser, header brut) ;
+# vidé quand il atteint sa taille max
+_CHANNEL_MAPPINGS_CACHE_SIZE = 1024
+_channel_mappings_cache: Dict[Tuple[type, bytes], List[Dict]] = {}
+
+
 class BaseTSVParser:
     """
     Interface de base pour les parseurs TSV.
     Chaque implémentation gère un format de fichier spécifique.
     """
 
+    # Lignes de longueur variable acceptées (cellules en trop ignorées,
+    # cellules manquantes sautées) au lieu de faire échouer le fichier
+    tolerate_ragged_rows = False
+
     @classmethod
     def build_channel_mappings(cls, line1, line2):
         """
@@ -68,21 +559,61 @@ class BaseTSVParser:
         """
         raise NotImplementedError
 
+    def channel_mappings_for(self, tsv: TSVFile) -> List[Dict]:
+        """
+        Mappings de canaux d'un fichier déjà lu (cf. TSVFile.read).
+
+        Les fichiers d'un même device partagent le plus souvent le même
+        header : les mappings sont mis en cache par (parser, octets du
+        header) et seule une copie en est retournée.
+        """
+        key = (type(self), tsv.header)
+        channel_mappings = _channel_mappings_cache.get(key)
+        if channel_mappings is None:
+            channel_mappings = self._build_channel_mappings_for(tsv)
+            if len(_channel_mappings_cache) >= _CHANNEL_MAPPINGS_CACHE_SIZE:
+                _channel_mappings_cache.clear()
+            _channel_mappings_cache[key] = channel_mappings
+        return [dict(m) for m in channel_mappings]
+
+    def _build_channel_mappings_for(self, tsv: TSVFile) -> List[Dict]:
+        channel_mappings, _ = self.build_channel_mappings(tsv.line1, tsv.line2)
+        return channel_mappings
+
     def parse_header(self, tsv_file: str) -> Tuple[List[Dict], str]:
         """
-        Parse les deux premières lignes du fichier TSV pour extraire
-        les informations de devices et de canaux.
+        Lit le header du fichier TSV (cf. TSVFile.read : deux premières
+        lignes, précédées du header JSON pour V003) pour extraire les
+        informations de devices et de canaux.
 
         Retourne:
             (channel_mappings, file_format)
         """
-        with open(tsv_file, "r", encoding="utf-8") as f:
-            line1 = f.readline().strip().split("\t")  # Device serial numbers
-            line2 = f.readline().strip().split("\t")  # Channel names with units
+        tsv = TSVFile.read(tsv_file)
+        return self.channel_mappings_for(tsv), tsv.file_format
 
-        file_format = line2[0]
-        channel_mappings, _ = self.build_channel_mappings(line1, line2)
-        return channel_mappings, file_format
+    def parse_tsv(
+        self,
+        tsv: TSVFile,
+        campaign: str,
+        channel_mappings: Optional[List[Dict]] = None,
+        encode: Optional[Callable[[List[str]], List[Any]]] = None,
+    ) -> Tuple[List[Any], Dict[str, Any]]:
+        """
+        Parse un fichier déjà lu (header + data), sans nouvel accès disque.
+
+        Retourne les lignes de line protocol, ou les lots produits par
+        `encode` si fourni (cf. _parse_frames).
+        """
+        if channel_mappings is None:
+            channel_mappings = self.channel_mappings_for(tsv)
+        frames = _iter_tsv_frames(
+            tsv.data, ragged_width=len(tsv.line1) if self.tolerate_ragged_rows else None
+        )
+        lines, stats = self._parse_frames(frames, channel_mappings, campaign, encode)
+        if tsv.header_meta is not None:
+            stats["file_header_meta"] = tsv.header_meta
+        return lines, stats
 
     def parse_data(
         self,
@@ -91,23 +622,144 @@ class BaseTSVParser:
         campaign: str,
         bucket_name: str,
         table_name: str,
-    ) -> Tuple[List[Point], Dict[str, Any]]:
+    ) -> Tuple[List[str], Dict[str, Any]]:
         """
-        Parse les lignes de données TSV et crée les Points InfluxDB.
+        Parse les lignes de données TSV et émet le line protocol InfluxDB.
         Implémentation par défaut, réutilisée par les sous-classes.
         """
-        df = pd.read_csv(tsv_file, sep="\t", skiprows=2, header=None)
+        return self.parse_tsv(TSVFile.read(tsv_file), campaign, channel_mappings)
 
-        points: List[Point] = []
+    def _parse_frames(
+        self,
+        frames: Iterable[Dict[int, np.ndarray]],
+        channel_mappings: List[Dict],
+        campaign: str,
+        encode: Optional[Callable[[List[str]], List[Any]]] = None,
+    ) -> Tuple[List[Any], Dict[str, Any]]:
+        """
+        Cœur du parsing, commun à tous les formats.
+
+        Les données sont traitées par blocs de lignes (frames) : chaque bloc
+        reste en colonnes (epochs int64 + matrice float64) jusqu'à l'émission
+        de ses lignes de line protocol, puis est libéré. Seuls des compteurs
+        par canal (nb, somme, min, max) sont conservés d'un bloc à l'autre.
+        Les tags constants d'un canal sont échappés une seule fois (préfixe
+        de ligne).
+
+        Si `encode` est fourni (ex. influx_utils.encode_batches), les lignes
+        de chaque bloc lui sont passées dès leur construction et seuls ses
+        résultats (lots encodés en bytes) sont conservés : la liste de toutes
+        les lignes du fichier n'existe jamais en mémoire.
+        """
+        nb_channels = len(channel_mappings)
+
+        # Tout ce qui dérive des mappings est calculé une fois par fichier,
+        # hors de la boucle sur les blocs. Measurement unifié "electrical"
+        channels = ChannelArrays.from_mappings(channel_mappings, "electrical", campaign)
 
+        nb_rows = 0
+        nb_cells = np.zeros(nb_channels, dtype=np.int64)
         nb_invalid_timestamps = 0
-        nb_invalid_values = 0
-        nb_rows = len(df)
-        nb_channels = len(channel_mappings)
+        invalid_ts_samples: List[Any] = []
+        counts = np.zeros(nb_channels, dtype=np.int64)
+        sums = np.zeros(nb_channels, dtype=np.float64)
+        mins = np.full(nb_channels, np.inf)
+        maxs = np.full(nb_channels, -np.inf)
+        ts_min: Optional[int] = None
+        ts_max: Optional[int] = None
+
+        output: List[Any] = []
+        nb_lines = 0
+
+        for frame in frames:
+            nb_frame_rows = _frame_len(frame)
+            nb_rows += nb_frame_rows
+
+            # Colonne passée telle quelle (tableau NumPy d'objets, sans liste
+            # Python intermédiaire) ; les epochs restent en int64 jusqu'au
+            # line protocol (aucune conversion datetime par ligne)
+            timestamps = np.asarray(frame[0], dtype=object) if 0 in frame else np.full(nb_frame_rows, None, dtype=object)
+            epochs, valid_ts = _to_epoch_seconds(timestamps)
+            nb_invalid_timestamps += int(nb_frame_rows - valid_ts.sum())
+            if len(invalid_ts_samples) < _LOG_SAMPLES:
+                invalid_ts_samples.extend(
+                    timestamps[i] for i in np.flatnonzero(~valid_ts)[:_LOG_SAMPLES - len(invalid_ts_samples)]
+                )
+
+            # Réductions NumPy sur les lignes à timestamp valide ; les valeurs
+            # non finies (absentes ou non numériques) sont exclues.
+            kept = _to_value_matrix(frame, channels.column_idx)[valid_ts]
+            if not len(kept):
+                continue
+            # Cellules présentes (hors cellules manquantes des lignes courtes)
+            if _ROW_WIDTHS in frame:
+                nb_cells += (channels.column_idx < frame[_ROW_WIDTHS][valid_ts][:, None]).sum(axis=0)
+            else:
+                nb_cells += len(kept)
+
+            finite = np.isfinite(kept)
+            chunk_counts = finite.sum(axis=0)
+            counts += chunk_counts
+            sums += np.where(finite, kept, 0.0).sum(axis=0)
+            np.minimum(mins, np.where(finite, kept, np.inf).min(axis=0), out=mins)
+            np.maximum(maxs, np.where(finite, kept, -np.inf).max(axis=0), out=maxs)
+
+            valid_epochs = epochs[valid_ts]
+            lo, hi = int(valid_epochs.min()), int(valid_epochs.max())
+            ts_min = lo if ts_min is None else min(ts_min, lo)
+            ts_max = hi if ts_max is None else max(ts_max, hi)
+
+            ts_suffixes = _timestamp_suffixes(valid_epochs)
+
+            # Le nombre de points du bloc est connu : la liste (celle du bloc,
+            # ou directement la sortie sans `encode`) est agrandie une seule
+            # fois puis remplie par tranches, canal par canal (colonne de la
+            # matrice), au lieu de croître ligne à ligne.
+            # Un passage unique sur la forme « longue » (melt : canal, ligne,
+            # valeur) a été mesuré ~20 % plus lent : préfixes et suffixes y
+            # sont relus par index pour chaque point.
+            nb_block_lines = int(chunk_counts.sum())
+            if encode is None:
+                lines, pos = output, len(output)
+                output.extend(repeat(None, nb_block_lines))
+            else:
+                lines, pos = [None] * nb_block_lines, 0
+            for j, prefix in enumerate(channels.prefix):
+                ok = finite[:, j]
+                end = pos + int(chunk_counts[j])
+                lines[pos:end] = _format_lines(prefix, kept[ok, j], ok, ts_suffixes)
+                pos = end
+            nb_lines += nb_block_lines
+            if encode is not None:
+                output.extend(encode(lines))
+            del lines
+
+        # Un seul warning par fichier et par type d'erreur (compteurs +
+        # échantillon), plutôt qu'un par cellule invalide
+        if nb_invalid_timestamps:
+            logger.warning(
+                "Could not parse timestamp on %d rows (e.g. %s)",
+                nb_invalid_timestamps,
+                ", ".join(repr(ts) for ts in invalid_ts_samples),
+            )
+
+        # Valeurs vides ou non numériques, sur les lignes à timestamp valide
+        invalid_per_channel = nb_cells - counts
+        nb_invalid_values = int(invalid_per_channel.sum())
+        if nb_invalid_values:
+            logger.warning(
+                "Invalid value at columns %s: %d values ignored",
+                ", ".join(
+                    f"{col_idx} ({n})"
+                    for col_idx, n in zip(channels.column_idx.tolist(), invalid_per_channel.tolist())
+                    if n
+                ),
+                nb_invalid_values,
+            )
 
         channel_stats: Dict[str, Dict[str, Any]] = {}
-        for mapping in channel_mappings:
-            cid = mapping["channel_id"]
+        for j, (cid, mapping) in enumerate(zip(channels.channel_id, channel_mappings)):
+            nb_points = int(counts[j])
             channel_stats[cid] = {
                 "column_idx": mapping["column_idx"],
                 "device_master_sn": mapping["device_master_sn"],
@@ -116,82 +768,32 @@ class BaseTSVParser:
                 "channel_label": mapping["channel_label"],
                 "channel_name": mapping["channel_name"],
                 "channel_unit": mapping["unit"],
-                "nb_points": 0,
-                "sum": 0.0,
-                "min": None,
-                "max": None,
-                "mean": None,
+                "nb_points": nb_points,
+                "min": float(mins[j]) if nb_points else None,
+                "max": float(maxs[j]) if nb_points else None,
+                "mean": float(sums[j]) / nb_points if nb_points else None,
             }
 
-        # On garde file_name uniquement pour les stats/rapports éventuels,
-        # mais on ne l'utilise plus comme tag dans InfluxDB.
-        file_name = Path(tsv_file).name
-
-        for _, row in df.iterrows():
-            timestamp_str = str(row[0])
-
-            timestamp = parse_timestamp(timestamp_str)
-            if timestamp is None:
-                logger.warning("Could not parse timestamp: %s", timestamp_str)
-                nb_invalid_timestamps += 1
-                continue
-
-            for mapping in channel_mappings:
-                col_idx = mapping["column_idx"]
-
-                try:
-                    value = float(row[col_idx])
-                except (ValueError, KeyError):
-                    logger.warning("Invalid value at column %s", col_idx)
-                    nb_invalid_values += 1
-                    continue
-
-                # Measurement unifié "electrical"
-                point = Point("electrical")
-                # Field = "<channel_id>_<unit>"
-                point = point.field(f"{mapping['channel_id']}_{mapping['unit']}", value)
-                # timestamp est déjà en UTC (tzinfo=timezone.utc), timestamp()
-                # renvoie donc un epoch en secondes UTC.
-                point = point.time(int(timestamp.timestamp()), WritePrecision.S)
-                point = point.tag("campaign", campaign)                            # campagne de mesure
-                point = point.tag("channel_id", mapping["channel_id"])             # M02001171_Ch1
-                point = point.tag("channel_unit", mapping["unit"])                 # V, W, Wa
-                point = point.tag("channel_label", mapping["channel_label"])       # U1, Ch1, ...
-                point = point.tag("channel_name", mapping["channel_name"])         # Ph 1, Voie1, ...
-                point = point.tag("device", mapping["device"])                     # MV2
-                point = point.tag("device_type", mapping["device_type"])           # master/slave
-                point = point.tag("device_subtype", mapping["device_subtype"])     # null/tri/mono
-                point = point.tag("device_master_sn", mapping["device_master_sn"]) # 02001171
-                point = point.tag("device_sn", mapping["device_sn"])               # 020011201
-                # NE PLUS ajouter file_name comme tag pour éviter la forte cardinalité
-                points.append(point)
-
-                cid = mapping["channel_id"]
-                cstats = channel_stats[cid]
-                cstats["nb_points"] += 1
-                cstats["sum"] += value
-                if cstats["min"] is None or value < cstats["min"]:
-                    cstats["min"] = value
-                if cstats["max"] is None or value > cstats["max"]:
-                    cstats["max"] = value
-
-        for cid, cstats in channel_stats.items():
-            if cstats["nb_points"] > 0:
-                cstats["mean"] = cstats["sum"] / cstats["nb_points"]
-            else:
-                cstats["mean"] = None
-            del cstats["sum"]
+        # Plage temporelle des timestamps valides, issue de la colonne déjà
+        # parsée (évite de relire le fichier pour la vérification Influx)
+        if ts_min is not None and ts_max is not None:
+            time_start = datetime.fromtimestamp(ts_min, tz=_UTC).isoformat()
+            time_end = datetime.fromtimestamp(ts_max, tz=_UTC).isoformat()
+        else:
+            time_start = time_end = None
 
         stats = {
             "nb_rows": nb_rows,
             "nb_channels": nb_channels,
-            "nb_points": len(points),
+            "nb_points": nb_lines,
             "nb_invalid_timestamps": nb_invalid_timestamps,
             "nb_invalid_values": nb_invalid_values,
+            "time_start": time_start,
+            "time_end": time_end,
             "channels": channel_stats,
         }
 
-        return points, stats
+        return output, stats
 
     def parse(
         self,
@@ -199,22 +801,15 @@ class BaseTSVParser:
         campaign: str,
         bucket_name: str,
         table_name: str,
-    ) -> Tuple[List[Point], Dict[str, Any]]:
+        channel_mappings: Optional[List[Dict]] = None,
+    ) -> Tuple[List[str], Dict[str, Any]]:
         """
-        Parse complet : header + data.
+        Parse complet : header + data, en une seule lecture du fichier.
 
-        - lit les 2 premières lignes
-        - construit les mappings via build_channel_mappings
-        - appelle parse_data avec les paramètres fournis.
+        Les mappings sont construits depuis le header, sauf si
+        channel_mappings est fourni (header déjà lu par l'appelant).
         """
-        with open(tsv_file, "r", encoding="utf-8") as f:
-            line1 = f.readline().strip().split("\t")
-            line2 = f.readline().strip().split("\t")
-
-        # file_format = line2[0]  # non utilisé ici, mais cohérent avec l'API
-        channel_mappings, _ = self.build_channel_mappings(line1, line2)
-
-        return self.parse_data(tsv_file, channel_mappings, campaign, bucket_name, table_name)
+        return self.parse_tsv(TSVFile.read(tsv_file), campaign, channel_mappings)
 
 
 class MV_T302_V002_Parser(BaseTSVParser):
@@ -234,7 +829,7 @@ class MV_T302_V002_Parser(BaseTSVParser):
 
         # Détection robuste tri/mono :
         # tri si on trouve Ph 1, Ph 2 et Ph 3 dans les libellés (peu importe l'ordre)
-        header_labels = [str(x).strip() for x in line2[1:]]  # on ignore line2[0] = file_format
+        header_labels = [x.strip() for x in line2[1:]]  # on ignore line2[0] = file_format
         has_ph1 = any(re.match(r"^Ph\s*1\b", s) for s in header_labels)
         has_ph2 = any(re.match(r"^Ph\s*2\b", s) for s in header_labels)
         has_ph3 = any(re.match(r"^Ph\s*3\b", s) for s in header_labels)
@@ -244,7 +839,10 @@ class MV_T302_V002_Parser(BaseTSVParser):
         device_channel_counter: Dict[str, int] = {}
 
         for col_idx in range(1, len(line1)):
-            device_sn = line1[col_idx]
+            # SN et unités se répètent d'un canal à l'autre : internés, ils
+            # sont partagés par tous les mappings/stats (et sérialisés une
+            # seule fois par pickle vers le process principal)
+            device_sn = sys.intern(line1[col_idx])
             channel_info = line2[col_idx]
 
             device_type = "master" if device_sn == device_master_sn else "slave"
@@ -269,12 +867,7 @@ class MV_T302_V002_Parser(BaseTSVParser):
                 channel_label = f"Ch{channel_number}"
 
             # Découpage "nom canal" / "unité"
-            parts = channel_info.rsplit(" ", 1)
-            if len(parts) == 2:
-                channel_name, unit = parts
-            else:
-                channel_name = channel_info
-                unit = ""
+            channel_name, unit = _split_channel_info(channel_info)
 
             # Schéma unifié :
             # - master : M<master>_<label>
@@ -291,11 +884,11 @@ class MV_T302_V002_Parser(BaseTSVParser):
                     "device_type": device_type,
                     "device_subtype": device_subtype if device_type == "master" else None,
                     "channel_label": channel_label,
-                    "channel_name": channel_name.strip(),
+                    "channel_name": channel_name,
                     "device_master_sn": device_master_sn,
                     "device": "MV2",
                     "device_sn": device_sn,
-                    "unit": unit.strip(),
+                    "unit": sys.intern(unit),
                 }
             )
 
@@ -308,6 +901,8 @@ class MV_T302_V003_Parser(BaseTSVParser):
     Fichiers avec blocs START_HEADER/END_HEADER et START_DATA/END_DATA.
     """
 
+    tolerate_ragged_rows = True
+
     @classmethod
     def build_channel_mappings(
         cls,
@@ -334,7 +929,7 @@ class MV_T302_V003_Parser(BaseTSVParser):
                 device_subtype = "mono"
 
         if device_subtype is None:
-            header_labels = [str(x).strip() for x in line2[1:]]  # ignore file_format
+            header_labels = [x.strip() for x in line2[1:]]  # ignore file_format
             has_ph1 = any(re.match(r"^Ph\s*1\b", s) for s in header_labels)
             has_ph2 = any(re.match(r"^Ph\s*2\b", s) for s in header_labels)
             has_ph3 = any(re.match(r"^Ph\s*3\b", s) for s in header_labels)
@@ -344,7 +939,7 @@ class MV_T302_V003_Parser(BaseTSVParser):
         device_channel_counter: Dict[str, int] = {}
 
         for col_idx in range(1, len(line1)):
-            device_sn = line1[col_idx]
+            device_sn = sys.intern(line1[col_idx])
             channel_info = line2[col_idx]
 
             device_type = "master" if device_sn == device_master_sn else "slave"
@@ -374,12 +969,7 @@ class MV_T302_V003_Parser(BaseTSVParser):
                 channel_label = f"Ch{channel_number}"
 
             # Découpage "nom canal" / "unité"
-            parts = channel_info.rsplit(" ", 1)
-            if len(parts) == 2:
-                channel_name, unit = parts
-            else:
-                channel_name = channel_info
-                unit = ""
+            channel_name, unit = _split_channel_info(channel_info)
 
             # Schéma unifié :
             # - master : M<master>_<label>
@@ -396,193 +986,24 @@ class MV_T302_V003_Parser(BaseTSVParser):
                     "device_type": device_type,
                     "device_subtype": device_subtype if device_type == "master" else None,
                     "channel_label": channel_label,
-                    "channel_name": channel_name.strip(),
+                    "channel_name": channel_name,
                     "device_master_sn": device_master_sn,
                     "device": "MV2",
                     "device_sn": device_sn,
-                    "unit": unit.strip(),
+                    "unit": sys.intern(unit),
                 }
             )
 
         return channel_mappings, device_master_sn
 
-    def _read_header_and_data(
-        self, tsv_file: str
-    ) -> Tuple[Dict[str, Any], List[str], List[str], List[str]]:
-        """
-        Retourne :
-        - header_meta : dict issu du JSON entre START_HEADER / END_HEADER
-        - line1 : SN devices (1ère ligne après START_DATA)
-        - line2 : format + noms de canaux
-        - data_lines : lignes de données jusqu'à END_DATA exclu
-        """
-        header_meta: Dict[str, Any] = {}
-        line1: List[str] = []
-        line2: List[str] = []
-        data_lines: List[str] = []
-
-        with open(tsv_file, "r", encoding="utf-8") as f:
-            in_header = False
-            in_data = False
-            header_json_line: Optional[str] = None
-
-            for raw in f:
-                line = raw.rstrip("\n")
-                if line == "START_HEADER":
-                    in_header = True
-                    continue
-                if line == "END_HEADER":
-                    in_header = False
-                    if header_json_line:
-                        try:
-                            header_meta = json.loads(header_json_line)
-                        except Exception as e:
-                            logger.warning("Impossible de parser le header JSON V003: %s", e)
-                    continue
-                if in_header:
-                    # Dans l'exemple, le JSON tient sur une seule ligne
-                    header_json_line = line
-                    continue
-
-                if line == "START_DATA":
-                    in_data = True
-                    # les deux prochaines lignes sont line1 et line2
-                    line1 = f.readline().rstrip("\n").split("\t")
-                    line2 = f.readline().rstrip("\n").split("\t")
-                    continue
-
-                if in_data:
-                    if line == "END_DATA":
-                        break
-                    data_lines.append(line)
-
-        return header_meta, line1, line2, data_lines
-
-    def parse_header(self, tsv_file: str) -> Tuple[List[Dict], str]:
-        """
-        Pour V003, on lit jusqu'à START_DATA, puis on utilise build_channel_mappings.
-        """
-        header_meta, line1, line2, _ = self._read_header_and_data(tsv_file)
-        file_format = line2[0]
-        channel_mappings, _ = self.build_channel_mappings(line1, line2, header_meta=header_meta)
-        return channel_mappings, file_format
-
-    def parse_data(
-        self,
-        tsv_file: str,
-        channel_mappings: List[Dict],
-        campaign: str,
-        bucket_name: str,
-        table_name: str,
-    ) -> Tuple[List[Point], Dict[str, Any]]:
-        """
-        Implémentation spécifique V003 (on ne peut pas utiliser le skiprows=2 générique).
-        """
-        header_meta, _line1, _line2, data_lines = self._read_header_and_data(tsv_file)
-
-        points: List[Point] = []
-        nb_invalid_timestamps = 0
-        nb_invalid_values = 0
-        nb_rows = len(data_lines)
-        nb_channels = len(channel_mappings)
-
-        channel_stats: Dict[str, Dict[str, Any]] = {}
-        for mapping in channel_mappings:
-            cid = mapping["channel_id"]
-            channel_stats[cid] = {
-                "column_idx": mapping["column_idx"],
-                "device_master_sn": mapping["device_master_sn"],
-                "device_sn": mapping["device_sn"],
-                "device_type": mapping["device_type"],
-                "channel_label": mapping["channel_label"],
-                "channel_name": mapping["channel_name"],
-                "channel_unit": mapping["unit"],
-                "nb_points": 0,
-                "sum": 0.0,
-                "min": None,
-                "max": None,
-                "mean": None,
-            }
-
-        for raw in data_lines:
-            parts = raw.split("\t")
-            if not parts:
-                continue
-            timestamp_str = str(parts[0])
-            timestamp = parse_timestamp(timestamp_str)
-            if timestamp is None:
-                logger.warning("Could not parse timestamp: %s", timestamp_str)
-                nb_invalid_timestamps += 1
-                continue
-
-            for mapping in channel_mappings:
-                col_idx = mapping["column_idx"]
-                if col_idx >= len(parts):
-                    continue
-                value_str = parts[col_idx]
-                try:
-                    value = float(value_str)
-                except ValueError:
-                    logger.warning("Invalid value at column %s", col_idx)
-                    nb_invalid_values += 1
-                    continue
-
-                point = Point("electrical")
-                point = point.field(f"{mapping['channel_id']}_{mapping['unit']}", value)
-                point = point.time(int(timestamp.timestamp()), WritePrecision.S)
-                point = point.tag("campaign", campaign)
-                point = point.tag("channel_id", mapping["channel_id"])
-                point = point.tag("channel_unit", mapping["unit"])
-                point = point.tag("channel_label", mapping["channel_label"])
-                point = point.tag("channel_name", mapping["channel_name"])
-                point = point.tag("device", mapping["device"])
-                point = point.tag("device_type", mapping["device_type"])
-                point = point.tag("device_subtype", mapping["device_subtype"])
-                point = point.tag("device_master_sn", mapping["device_master_sn"])
-                point = point.tag("device_sn", mapping["device_sn"])
-                points.append(point)
-
-                cid = mapping["channel_id"]
-                cstats = channel_stats[cid]
-                cstats["nb_points"] += 1
-                cstats["sum"] += value
-                if cstats["min"] is None or value < cstats["min"]:
-                    cstats["min"] = value
-                if cstats["max"] is None or value > cstats["max"]:
-                    cstats["max"] = value
-
-        for cid, cstats in channel_stats.items():
-            if cstats["nb_points"] > 0:
-                cstats["mean"] = cstats["sum"] / cstats["nb_points"]
-            else:
-                cstats["mean"] = None
-            del cstats["sum"]
-
-        stats = {
-            "nb_rows": nb_rows,
-            "nb_channels": nb_channels,
-            "nb_points": len(points),
-            "nb_invalid_timestamps": nb_invalid_timestamps,
-            "nb_invalid_values": nb_invalid_values,
-            "channels": channel_stats,
-            "file_header_meta": header_meta,
-        }
-
-        return points, stats
-
-    def parse(
-        self,
-        tsv_file: str,
-        campaign: str,
-        bucket_name: str,
-        table_name: str,
-    ) -> Tuple[List[Point], Dict[str, Any]]:
+    def _build_channel_mappings_for(self, tsv: TSVFile) -> List[Dict]:
         """
-        Parse complet V003 : header + data.
+        Pour V003, le header JSON (MasterType) complète les deux lignes de header.
         """
-        header_meta, line1, line2, _data_lines = self._read_header_and_data(tsv_file)
-        channel_mappings, _ = self.build_channel_mappings(line1, line2, header_meta=header_meta)
-        return self.parse_data(tsv_file, channel_mappings, campaign, bucket_name, table_name)
+        channel_mappings, _ = self.build_channel_mappings(
+            tsv.line1, tsv.line2, header_meta=tsv.header_meta
+        )
+        return channel_mappings
 
 
 class TSVParserFactory:
@@ -618,40 +1039,17 @@ class TSVParserFactory:
 
 def parse_tsv_header(tsv_file: str) -> Tuple[List[Dict], str]:
     """
-    Lit les deux premières lignes utiles du fichier, détecte le format et
+    Lit le header du fichier (cf. TSVFile.read), détecte le format et
     délègue la construction des mappings au parser adapté.
 
     Gère à la fois les fichiers "classiques" (V002) et ceux avec
-    START_HEADER/END_HEADER + START_DATA (V003).
+    START_HEADER/END_HEADER + START_DATA (V003) : mêmes mappings que
+    parser.parse() (pour V003, MasterType du header JSON prioritaire sur la
+    détection Ph 1/2/3).
     """
-    with open(tsv_file, "r", encoding="utf-8") as f:
-        first = f.readline().strip()
-        if first == "START_HEADER":
-            # On saute le header JSON jusqu'à START_DATA
-            for line in f:
-                line = line.strip()
-                if line == "START_DATA":
-                    # Les deux prochaines lignes sont line1 et line2
-                    line1 = f.readline().strip().split("\t")
-                    line2 = f.readline().strip().split("\t")
-                    break
-        else:
-            # Cas V002 : on a déjà lu la première ligne
-            line1 = first.split("\t")
-            line2 = f.readline().strip().split("\t")
-
-    file_format = line2[0]
-    parser = TSVParserFactory.get_parser(file_format)
-
-    if hasattr(parser, "build_channel_mappings"):
-        # Pour V003, parse_tsv_header() ne lit pas le JSON.
-        # => build_channel_mappings V003 doit pouvoir détecter tri/mono via Ph1/2/3.
-        channel_mappings, _ = parser.build_channel_mappings(line1, line2)
-    else:
-        # Fallback générique : on laisse le parser relire le fichier
-        channel_mappings, _ = parser.parse_header(tsv_file)
-
-    return channel_mappings, file_format
+    tsv = TSVFile.read(tsv_file)
+    parser = TSVParserFactory.get_parser(tsv.file_format)
+    return parser.channel_mappings_for(tsv), tsv.file_format
 
 
 def parse_tsv_data(
@@ -660,27 +1058,13 @@ def parse_tsv_data(
     campaign: str,
     bucket_name: str,
     table_name: str,
-) -> Tuple[List[Any], Dict[str, Any]]:
+) -> Tuple[List[str], Dict[str, Any]]:
     """
     Parse les données en utilisant le parser adapté au format détecté
     dans le header du fichier.
 
     Signature conservée pour compatibilité avec les tests.
     """
-    with open(tsv_file, "r", encoding="utf-8") as f:
-        first = f.readline().strip()
-        if first == "START_HEADER":
-            # Aller jusqu'à START_DATA puis lire line2
-            for line in f:
-                line = line.strip()
-                if line == "START_DATA":
-                    _line1 = f.readline().strip().split("\t")
-                    line2 = f.readline().strip().split("\t")
-                    break
-        else:
-            _line1 = first.split("\t")
-            line2 = f.readline().strip().split("\t")
-
-    file_format = line2[0]
-    parser = TSVParserFactory.get_parser(file_format)
-    return parser.parse_data(tsv_file, channel_mappings, campaign, bucket_name, table_name)
+    tsv = TSVFile.read(tsv_file)
+    parser = TSVParserFactory.get_parser(tsv.file_format)
+    return parser.parse_tsv(tsv, campaign, channel_mappings)
@@ -1,9 +1,8 @@
 import os
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Set, Tuple
 
 import logging
-from shutil import move
 
 logger = logging.getLogger("tsv_parser")
 
@@ -33,6 +32,36 @@ def extract_path_components(tsv_path: str, base_folder: str) -> Tuple[str, str,
     return bucket_name, campaign_name, device_master_sn
 
 
+# Dossiers parsed/ et error/ déjà créés pendant ce run (évite un mkdir par fichier)
+_archive_dirs: Set[str] = set()
+
+
+def _move_to_subdir(tsv_file: str, subdir: str) -> str:
+    """
+    Déplace un fichier dans le sous-dossier `subdir` de son dossier (même
+    nom de fichier) et retourne le nouveau chemin.
+
+    Même système de fichiers : un simple rename(2) (os.replace), sans les
+    stat() de shutil.move ni objets Path. Le sous-dossier n'est créé qu'au
+    premier fichier déplacé (puis recréé s'il a disparu entre-temps).
+    """
+    parent, name = os.path.split(tsv_file)
+    target_dir = os.path.join(parent, subdir)
+    new_path = os.path.join(target_dir, name)
+
+    if target_dir not in _archive_dirs:
+        os.makedirs(target_dir, exist_ok=True)
+        _archive_dirs.add(target_dir)
+    try:
+        os.replace(tsv_file, new_path)
+    except FileNotFoundError:
+        if not os.path.isfile(tsv_file):
+            raise
+        os.makedirs(target_dir, exist_ok=True)
+        os.replace(tsv_file, new_path)
+    return new_path
+
+
 def move_parsed_file(tsv_file: str) -> None:
     """
     Déplace un fichier traité dans un sous-dossier 'parsed' du device.
@@ -41,12 +70,8 @@ def move_parsed_file(tsv_file: str) -> None:
         /srv/sftpgo/data/company/campaign/device/file.tsv
         -> /srv/sftpgo/data/company/campaign/device/parsed/file.tsv
     """
-    path = Path(tsv_file)
-    target_dir = path.parent / "parsed"
-    target_dir.mkdir(exist_ok=True)
-    new_path = target_dir / path.name
-    move(str(path), str(new_path))
-    logger.info("  Moved parsed file to: %s", new_path)
+    new_path = _move_to_subdir(tsv_file, "parsed")
+    logger.debug("  Moved parsed file to: %s", new_path)
 
 
 def move_error_file(tsv_file: str) -> None:
@@ -57,26 +82,41 @@ def move_error_file(tsv_file: str) -> None:
         /srv/sftpgo/data/company/campaign/device/file.tsv
         -> /srv/sftpgo/data/company/campaign/device/error/file.tsv
     """
-    path = Path(tsv_file)
-    target_dir = path.parent / "error"
-    target_dir.mkdir(exist_ok=True)
-    new_path = target_dir / path.name
-    move(str(path), str(new_path))
-    logger.info("  Moved error file to: %s", new_path)
+    new_path = _move_to_subdir(tsv_file, "error")
+    logger.debug("  Moved error file to: %s", new_path)
 
 
-def find_tsv_files(base_folder: str) -> List[str]:
+def find_tsv_files(base_folder: str) -> Iterator[str]:
     """
     Recherche récursivement tous les fichiers .tsv qui n'ont pas encore été traités.
 
     On ignore explicitement les sous-dossiers 'parsed' et 'error' pour ne pas
     retraiter les fichiers déjà déplacés.
+
+    Parcours via os.scandir (le type des entrées est fourni par le répertoire,
+    sans stat() supplémentaire) avec une pile explicite plutôt qu'une
+    récursion de générateurs (chaque chemin n'est pas relayé par tous les
+    niveaux de `yield from`) ; les chemins sont produits au fil de l'eau
+    pour que l'appelant puisse commencer avant la fin du parcours.
+
+    Comme os.walk, un dossier illisible ou supprimé pendant le parcours est
+    ignoré (warning) sans interrompre la recherche dans les autres dossiers.
     """
-    tsv_files: List[str] = []
-    for root, dirs, files in os.walk(base_folder):
-        # On évite de descendre dans parsed/ et error/
-        dirs[:] = [d for d in dirs if d not in ("parsed", "error")]
-        for file in files:
-            if file.endswith('.tsv'):
-                tsv_files.append(os.path.join(root, file))
-    return tsv_files
+    stack = [base_folder]
+    while stack:
+        folder = stack.pop()
+        subdirs: List[str] = []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        # On évite de descendre dans parsed/ et error/
+                        if entry.name not in ("parsed", "error"):
+                            subdirs.append(entry.path)
+                    elif entry.name.endswith(".tsv") and entry.is_file(follow_symlinks=False):
+                        yield entry.path
+        except OSError as e:
+            logger.warning("Dossier ignoré pendant la recherche des TSV : %s (%s)", folder, e)
+
+        # Même ordre que le parcours récursif : sous-dossiers dans l'ordre de scandir
+        stack.extend(reversed(subdirs))
@@ -1,12 +1,19 @@
 import os
 import logging
+import random
+import socket
+import threading
+import time
+import weakref
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 import influxdb_client
+import urllib3
 from influxdb_client import InfluxDBClient, Point, WritePrecision
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client.client.write_api import SYNCHRONOUS, WriteApi
+from influxdb_client.rest import ApiException
 from dotenv import load_dotenv
 
 # Charge les variables d'environnement (.env)
@@ -32,43 +39,252 @@ def setup_influxdb_client() -> Tuple[InfluxDBClient, str]:
             "Missing required environment variables: INFLUXDB_HOST/INFLUXDB_URL and INFLUXDB_ADMIN_TOKEN"
         )
 
+    # Valide le transport d'écriture dès le démarrage
+    _get_write_transport()
+
+    # Compression gzip des requêtes : les tags d'un canal sont répétés sur
+    # chaque ligne de line protocol, le payload se compresse très bien
+    # (~50x sur un fichier réel). Désactivable via INFLUX_WRITE_GZIP=false.
+    enable_gzip = os.getenv("INFLUX_WRITE_GZIP", "true").strip().lower() not in ("0", "false", "no")
+
     client = influxdb_client.InfluxDBClient(
         url=url,
         token=token,
         org=org,
+        enable_gzip=enable_gzip,
     )
     return client, org
 
 
+# Buckets dont l'existence est connue, par client (libérés avec le client)
+_known_buckets: "weakref.WeakKeyDictionary[Any, Set[str]]" = weakref.WeakKeyDictionary()
+_known_buckets_lock = threading.Lock()
+
+
 def create_bucket_if_not_exists(client: InfluxDBClient, bucket_name: str, org: str) -> None:
     """
     Crée le bucket InfluxDB s'il n'existe pas.
+
+    Les noms de buckets existants sont mis en cache pour ce client : la
+    liste n'est redemandée au serveur (GET /buckets) que pour un bucket
+    encore inconnu. Sûr en multi-threads (threads d'écriture).
     """
-    buckets_api = client.buckets_api()
-    existing_buckets = buckets_api.find_buckets().buckets
+    with _known_buckets_lock:
+        known = _known_buckets.setdefault(client, set())
+        if bucket_name in known:
+            return
 
-    if not any(bucket.name == bucket_name for bucket in existing_buckets):
-        logger.info("Creating bucket: %s", bucket_name)
-        buckets_api.create_bucket(bucket_name=bucket_name, org=org)
+        buckets_api = client.buckets_api()
+        known.update(bucket.name for bucket in buckets_api.find_buckets().buckets)
 
+        if bucket_name not in known:
+            logger.info("Creating bucket: %s", bucket_name)
+            buckets_api.create_bucket(bucket_name=bucket_name, org=org)
+            known.add(bucket_name)
 
-def write_points(
+
+DEFAULT_WRITE_BATCH_SIZE = 10_000
+
+
+def _get_write_batch_size() -> int:
+    """
+    Taille des lots d'écriture lue dans INFLUX_BATCH_SIZE : une valeur non
+    entière ou <= 0 est ignorée (warning) au profit de la valeur par défaut.
+    """
+    raw = os.getenv("INFLUX_BATCH_SIZE", "").strip()
+    if not raw:
+        return DEFAULT_WRITE_BATCH_SIZE
+    try:
+        size = int(raw)
+    except ValueError:
+        size = 0
+    if size <= 0:
+        logger.warning(
+            "INFLUX_BATCH_SIZE invalide (%r) : entier > 0 attendu, utilisation de %d",
+            raw,
+            DEFAULT_WRITE_BATCH_SIZE,
+        )
+        return DEFAULT_WRITE_BATCH_SIZE
+    return size
+
+
+# Nombre de lignes de line protocol envoyées par requête d'écriture
+# (surchargeable via INFLUX_BATCH_SIZE)
+WRITE_BATCH_SIZE = _get_write_batch_size()
+
+# Retries des écritures (et d'elles seules, cf. _write_with_retries) :
+# backoff exponentiel 5s -> 125s max (+ jitter), Retry-After respecté sur
+# 429/503. Les requêtes Flux et les appels sur les buckets ne sont pas
+# rejoués : un serveur injoignable les fait échouer tout de suite.
+WRITE_MAX_RETRIES = 5
+WRITE_RETRY_INTERVAL = 5.0
+WRITE_MAX_RETRY_DELAY = 125.0
+WRITE_RETRY_JITTER = 0.5
+
+# Les TSV sont à la seconde : on écrit avec la précision la plus grossière
+# possible (timestamps plus courts et mieux compressés côté InfluxDB).
+# Le line protocol émis par core.py porte des epochs en secondes.
+WRITE_PRECISION = WritePrecision.S
+
+# Taille max d'un datagramme UDP (sous la MTU Ethernet, évite la fragmentation IP)
+UDP_MAX_PAYLOAD = 1_400
+
+_udp_warning_emitted = False
+
+
+def _get_write_transport() -> str:
+    """
+    Transport d'écriture choisi via INFLUX_WRITE_TRANSPORT :
+
+    - "http" (défaut) : API d'écriture InfluxDB, avec acquittement ;
+    - "udp" : datagrammes line protocol vers un listener UDP
+      (ex. Telegraf socket_listener), sans acquittement.
+    """
+    transport = os.getenv("INFLUX_WRITE_TRANSPORT", "http").strip().lower()
+    if transport not in ("http", "udp"):
+        raise ValueError(f"INFLUX_WRITE_TRANSPORT non supporté : {transport} (attendu : http ou udp)")
+    return transport
+
+
+def _write_lines_udp(lines: Iterable[bytes]) -> int:
+    """
+    Envoie des lignes de line protocol (encodées) en UDP vers
+    INFLUX_UDP_HOST:INFLUX_UDP_PORT, regroupées en datagrammes d'au plus
+    UDP_MAX_PAYLOAD octets. Retourne le nombre de lignes envoyées.
+
+    Le routage vers le bucket est à la charge du listener (InfluxDB 2
+    n'expose pas d'écoute UDP). Les timestamps étant en secondes, le listener
+    doit être configuré en conséquence (Telegraf : influx_timestamp_precision = "1s"),
+    la précision par défaut du line protocol étant la nanoseconde.
+    """
+    global _udp_warning_emitted
+    if not _udp_warning_emitted:
+        logger.warning(
+            "Transport UDP : écritures sans acquittement, des points peuvent être perdus "
+            "(voir la vérification du nombre de points par fichier)."
+        )
+        _udp_warning_emitted = True
+
+    addr = (os.getenv("INFLUX_UDP_HOST", "localhost"), int(os.getenv("INFLUX_UDP_PORT", "8089")))
+
+    nb_lines = 0
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        payload: List[bytes] = []
+        size = 0
+        for data in lines:
+            if payload and size + len(data) > UDP_MAX_PAYLOAD:
+                sock.sendto(b"\n".join(payload), addr)
+                payload = []
+                size = 0
+            payload.append(data)
+            size += len(data) + 1
+            nb_lines += 1
+        if payload:
+            sock.sendto(b"\n".join(payload), addr)
+    return nb_lines
+
+
+def encode_batches(lines: List[str]) -> List[bytes]:
+    """
+    Regroupe des lignes de line protocol en lots de WRITE_BATCH_SIZE lignes,
+    chacun encodé une fois en bytes (corps de requête prêt à envoyer).
+
+    Appelé dans les process de parsing : un lot se pickle comme un seul
+    bloc d'octets, là où une liste de lignes coûte un objet str par point
+    au transfert vers le process principal.
+    """
+    return [
+        "\n".join(lines[i:i + WRITE_BATCH_SIZE]).encode("utf-8")
+        for i in range(0, len(lines), WRITE_BATCH_SIZE)
+    ]
+
+
+def write_batches(
     client: InfluxDBClient,
     bucket_name: str,
     org: str,
-    points: List[Point],
+    batches: List[bytes],
+    write_api: Optional[WriteApi] = None,
 ) -> None:
     """
-    Écrit une liste de points dans InfluxDB.
+    Écrit des lots de line protocol déjà encodés (cf. encode_batches,
+    timestamps en secondes) dans InfluxDB via le transport configuré
+    (cf. _get_write_transport).
+
+    En HTTP, chaque lot est une requête d'un WriteApi synchrone : `write_api`
+    permet de réutiliser celui créé au démarrage (partagé par les threads
+    d'écriture), sinon un WriteApi est créé pour l'appel. Chaque lot est
+    rejoué en cas d'erreur transitoire (cf. _write_with_retries).
     """
-    if not points:
+    if not batches:
         return
-    write_api = client.write_api(write_options=SYNCHRONOUS)
-    write_api.write(bucket=bucket_name, org=org, record=points)
-    # Message conservé dans les logs
-    logger.info("  ✓ Successfully written to InfluxDB")
-    # Et également sur stdout pour compatibilité avec les tests existants
-    print("Successfully written to InfluxDB")
+
+    if _get_write_transport() == "udp":
+        nb_lines = _write_lines_udp(line for batch in batches for line in batch.split(b"\n"))
+        logger.debug("  ✓ Sent to InfluxDB over UDP (%d lines)", nb_lines)
+        return
+
+    if write_api is None:
+        write_api = client.write_api(write_options=SYNCHRONOUS)
+
+    for payload in batches:
+        _write_with_retries(write_api, bucket_name, org, payload)
+
+    logger.debug("  ✓ Successfully written to InfluxDB")
+
+
+def _write_with_retries(write_api: WriteApi, bucket_name: str, org: str, payload: bytes) -> None:
+    """
+    Écrit un lot via `write_api`, en le rejouant jusqu'à WRITE_MAX_RETRIES
+    fois sur erreur transitoire : réponse 429 ou 5xx, ou erreur réseau
+    (connexion refusée, timeout...). Les autres erreurs (400, 401...) et
+    la dernière tentative échouée sont propagées.
+    """
+    for attempt in range(WRITE_MAX_RETRIES + 1):
+        try:
+            write_api.write(bucket=bucket_name, org=org, record=payload, write_precision=WRITE_PRECISION)
+            return
+        except (ApiException, urllib3.exceptions.HTTPError) as e:
+            status = getattr(e, "status", None)
+            retryable = status is None or status in (0, 429) or status >= 500
+            if not retryable or attempt == WRITE_MAX_RETRIES:
+                raise
+            delay = _write_retry_delay(e, attempt)
+            logger.warning(
+                "Écriture InfluxDB échouée (%s), nouvelle tentative %d/%d dans %.1f s",
+                status or type(e).__name__,
+                attempt + 1,
+                WRITE_MAX_RETRIES,
+                delay,
+            )
+            time.sleep(delay)
+
+
+def _write_retry_delay(error: Exception, attempt: int) -> float:
+    """
+    Délai avant la tentative suivante : Retry-After s'il est fourni par le
+    serveur, sinon backoff exponentiel borné par WRITE_MAX_RETRY_DELAY.
+    """
+    headers = getattr(error, "headers", None) or {}
+    try:
+        delay = float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        delay = min(WRITE_RETRY_INTERVAL * 2 ** attempt, WRITE_MAX_RETRY_DELAY)
+    return delay + random.uniform(0, WRITE_RETRY_JITTER)
+
+
+def write_points(
+    client: InfluxDBClient,
+    bucket_name: str,
+    org: str,
+    lines: List[str],
+    write_api: Optional[WriteApi] = None,
+) -> None:
+    """
+    Écrit des lignes de line protocol (timestamps en secondes) dans InfluxDB,
+    par lots de WRITE_BATCH_SIZE lignes (cf. write_batches).
+    """
+    write_batches(client, bucket_name, org, encode_batches(lines), write_api=write_api)
 
 
 def write_run_summary_to_influx(
@@ -88,6 +304,10 @@ def write_run_summary_to_influx(
     try:
         write_api = client.write_api(write_options=SYNCHRONOUS)
 
+        # Un seul horodatage pour tout le résumé : les points du run et de
+        # ses fichiers restent alignés sur la même seconde
+        now = datetime.now(timezone.utc)
+
         # Point global pour le run
         p_run = (
             Point("tsv_parser_run")
@@ -98,7 +318,7 @@ def write_run_summary_to_influx(
             .field("nb_points_total", report.get("nb_points_total", 0))
             .field("duration_s", report.get("duration_s", 0.0))
             .field("base_folder", str(report.get("base_folder", "")))
-            .time(datetime.now(timezone.utc), WritePrecision.S)
+            .time(now, WRITE_PRECISION)
         )
 
         # Points par fichier (on reste léger : pas de stats détaillées par channel ici)
@@ -116,7 +336,7 @@ def write_run_summary_to_influx(
                 .field("nb_points", f.get("nb_points", 0))
                 .field("nb_invalid_timestamps", f.get("nb_invalid_timestamps", 0))
                 .field("nb_invalid_values", f.get("nb_invalid_values", 0))
-                .time(datetime.now(timezone.utc), WritePrecision.S)
+                .time(now, WRITE_PRECISION)
             )
             file_points.append(p_file)
 
@@ -1,16 +1,22 @@
+import json
+import multiprocessing
 import os
+import re
+import sys
 import textwrap
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List
 
+import numpy as np
 import pandas as pd
 import pytest
 
 # On importe le module à tester
 import tsv_parser
+import core
 import influx_utils
-from core import parse_tsv_data, parse_tsv_header
+from core import parse_timestamp, parse_tsv_data, parse_tsv_header
 from fs_utils import (
     extract_path_components as _extract_path_components,
     move_parsed_file as _move_parsed_file,
@@ -31,6 +37,93 @@ def write_tmp_tsv(tmp_path: Path, content: str) -> Path:
     return file_path
 
 
+def _unescape(s: str) -> str:
+    return re.sub(r"\\(.)", r"\1", s)
+
+
+def parse_line(line: str):
+    """
+    Découpe une ligne de line protocol émise par le parseur en
+    (measurement, tags, fields, timestamp).
+    """
+    head, field_set, ts = re.split(r"(?<!\\) ", line)
+    measurement, *tag_parts = re.split(r"(?<!\\),", head)
+    tags = dict(
+        tuple(_unescape(x) for x in re.split(r"(?<!\\)=", part, maxsplit=1))
+        for part in tag_parts
+    )
+    field_key, field_value = re.split(r"(?<!\\)=", field_set, maxsplit=1)
+    fields = {_unescape(field_key): float(field_value)}
+    return _unescape(measurement), tags, fields, int(ts)
+
+
+# ---------------------------------------------------------------------------
+# Tests pour parse_timestamp
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize(
+    "ts",
+    [
+        "05/01/26 10:00:00",    # cas nominal (chemin rapide)
+        "29/02/24 23:59:59",
+        "01/01/70 00:00:00",    # pivot %y : 1970
+        "5/1/26 1:02:03",       # sans zéros de tête (repli strptime)
+        " 05/01/26 10:00:00\r",
+        "31/02/26 10:00:00",    # date impossible
+        "01/01/26 24:00:00",
+        "INVALID_TS",
+        "",
+    ],
+)
+def test_parse_timestamp_matches_strptime(ts):
+    """
+    Vérifie que le chemin rapide de parse_timestamp donne exactement le même
+    résultat que datetime.strptime("%d/%m/%y %H:%M:%S") en UTC.
+    """
+    try:
+        expected = datetime.strptime(ts.strip(), "%d/%m/%y %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        expected = None
+
+    assert parse_timestamp(ts) == expected
+
+
+def test_timestamp_column_matches_parse_timestamp():
+    """
+    Vérifie que le parsing vectorisé de la colonne des timestamps (décodage
+    NumPy puis pandas) accepte et rejette exactement les mêmes valeurs que
+    parse_timestamp.
+    """
+    timestamps = [
+        "05/01/26 10:00:00",
+        "5/1/70 1:2:3",
+        " 05/01/26 10:00:00\r",
+        "31/12/68 23:59:59",
+        "01/01/69 00:00:00",
+        "29/02/24 12:00:00",
+        "29/02/25 12:00:00",
+        "31/02/26 10:00:00",
+        "31/04/26 10:00:00",
+        "00/01/26 10:00:00",
+        "05/13/26 10:00:00",
+        "05/01/26 10:00:60",    # secondes 60 : reportées par pandas
+        "05/01/26 10:00:61",
+        "05/01/26 24:00:00",
+        "05/01/26 10:00:00 extra",
+        "05-01-26 10:00:00",
+        "INVALID_TS",
+        "",
+        None,
+    ]
+    epochs, valid = core._to_epoch_seconds(timestamps)
+
+    for ts, epoch, ok in zip(timestamps, epochs.tolist(), valid.tolist()):
+        expected = parse_timestamp(ts) if ts is not None else None
+        assert ok == (expected is not None), ts
+        if ok:
+            assert epoch == int(expected.timestamp()), ts
+
+
 # ---------------------------------------------------------------------------
 # Tests pour parse_tsv_header
 # ---------------------------------------------------------------------------
@@ -114,6 +207,24 @@ def test_parse_tsv_header_detects_tri_even_if_phases_not_at_fixed_positions(tmp_
     assert labels == ["U1", "U2", "U3", "Ch1", "Ch2", "Ch3"]
 
 
+@pytest.mark.parametrize(
+    "channel_info",
+    ["Ph 1 V", "Voie1 W", "Voie1", "", " ", "Ph 1 V ", " Ph 1  V", "I 1 A\r", "Temp. °C"],
+)
+def test_split_channel_info_matches_rsplit(channel_info):
+    """
+    Vérifie que le découpage nom / unité par regex donne le même résultat
+    que channel_info.rsplit(" ", 1) suivi de strip().
+    """
+    parts = channel_info.rsplit(" ", 1)
+    if len(parts) == 2:
+        expected = (parts[0].strip(), parts[1].strip())
+    else:
+        expected = (channel_info.strip(), "")
+
+    assert core._split_channel_info(channel_info) == expected
+
+
 def test_parse_tsv_header_v003_with_json_header(tmp_path):
     """
     Vérifie que parse_tsv_header gère un fichier MV_T302_V003 avec START_HEADER/START_DATA.
@@ -158,6 +269,29 @@ def test_parse_tsv_header_v003_with_json_header(tmp_path):
     assert m1["channel_id"] == "M02001311_Ch1"
 
 
+def test_parse_tsv_header_v003_uses_master_type_from_json(tmp_path):
+    """
+    Vérifie que parse_tsv_header lit le header JSON V003 : MasterType est
+    prioritaire sur la détection Ph 1/2/3, comme dans parser.parse().
+    """
+    content = """
+    START_HEADER
+    {"FileVersion":3,"MasterType":"Tri"}
+    END_HEADER
+    START_DATA
+    02001311\t02001311\t02001311\t02001311\t02001311
+    MV_T302_V003\tPh 1 V\tVoie1 W\tVoie2 W\tVoie3 W
+    21/01/26 08:15:24\t236.14\t0.0\t0.0\t0.0
+    END_DATA
+    """
+    tsv_file = write_tmp_tsv(tmp_path, content)
+
+    mappings, _ = parse_tsv_header(str(tsv_file))
+
+    assert all(m["device_subtype"] == "tri" for m in mappings)
+    assert [m["channel_label"] for m in mappings] == ["U1", "U2", "U3", "Ch1"]
+
+
 def test_parse_tsv_header_v003_real_file_utc_metadata_4_all_mapping_fields():
     """
     Test d'intégration sur le fichier réel :
@@ -244,7 +378,8 @@ def test_parse_tsv_header_v003_real_file_utc_metadata_4_all_mapping_fields():
 
 def test_parse_tsv_data_creates_points(monkeypatch, tmp_path):
     """
-    Vérifie que parse_tsv_data crée bien des Points InfluxDB avec les bons tags/champs.
+    Vérifie que parse_tsv_data émet bien des lignes de line protocol
+    avec les bons tags/champs.
     """
     content = """
     02001171\t02001171
@@ -271,12 +406,11 @@ def test_parse_tsv_data_creates_points(monkeypatch, tmp_path):
     assert stats["nb_channels"] == 1
     assert stats["nb_points"] == 2
 
-    p0 = points[0]
+    name, tags, fields, ts = parse_line(points[0])
     # measurement unifié
-    assert p0._name == "electrical"
+    assert name == "electrical"
 
     # tags
-    tags = dict(p0._tags)
     assert tags["campaign"] == "campaign1"
     assert tags["channel_name"] == "Ph 1"
     assert tags["channel_unit"] == "V"
@@ -284,14 +418,11 @@ def test_parse_tsv_data_creates_points(monkeypatch, tmp_path):
     assert tags["device_sn"] == "02001171"
 
     # field
-    fields = dict(p0._fields)
     # field name = "<channel_id>_<unit>"
-    assert len(fields) == 1
-    value = list(fields.values())[0]
-    assert value == pytest.approx(242.25)
+    assert fields == {"M02001171_U1_V": pytest.approx(242.25)}
 
-    # timestamp : on vérifie juste que c'est un entier (epoch seconds)
-    assert isinstance(p0._time, int)
+    # timestamp : epoch seconds UTC de "03/08/25 03:20:00"
+    assert ts == int(datetime(2025, 8, 3, 3, 20, tzinfo=timezone.utc).timestamp())
 
 
 def test_parse_tsv_data_v003_creates_points(tmp_path, caplog):
@@ -336,21 +467,133 @@ def test_parse_tsv_data_v003_creates_points(tmp_path, caplog):
     assert header_meta.get("FileVersion") == 3
     assert header_meta.get("MasterType") == "Mono"
 
-    p0 = points[0]
-    assert p0._name == "electrical"
-    tags = dict(p0._tags)
+    name, tags, fields, _ts = parse_line(points[0])
+    assert name == "electrical"
     assert tags["campaign"] == "campaign_v003"
     assert tags["device_master_sn"] == "02001311"
     assert tags["device_sn"] == "02001311"
     assert "channel_id" in tags
     assert "channel_unit" in tags
 
-    fields = dict(p0._fields)
     assert len(fields) == 1
     v = list(fields.values())[0]
     assert isinstance(v, float)
 
 
+@pytest.mark.parametrize("with_pyarrow", [True, False])
+def test_parse_v003_tolerates_ragged_rows(monkeypatch, tmp_path, with_pyarrow):
+    """
+    Vérifie qu'un fichier V003 avec des lignes de longueur variable est
+    parsé comme avant : cellules en trop ignorées, cellules manquantes
+    sautées sans être comptées invalides, cellule vide invalide.
+    """
+    if not with_pyarrow:
+        monkeypatch.setattr(core, "pa", None)
+
+    content = """
+    START_HEADER
+    {"FileVersion":3,"MasterType":"Mono"}
+    END_HEADER
+    START_DATA
+    02001311\t02001311\t02001311
+    MV_T302_V003\tPh 1 V\tVoie1 W
+    21/01/26 08:15:00\t236.1\t1.0
+    21/01/26 08:20:00\t237.2\t2.0\t999.0
+    21/01/26 08:25:00\t238.3
+    21/01/26 08:30:00\t\t4.0
+    END_DATA
+    """
+    tsv_file = write_tmp_tsv(tmp_path, content)
+
+    parser = core.TSVParserFactory.get_parser("MV_T302_V003")
+    points, stats = parser.parse(str(tsv_file), "campaign_v003", "company_v003", "electrical")
+
+    assert stats["nb_rows"] == 4
+    assert len(points) == 6
+    assert stats["nb_invalid_values"] == 1
+    assert stats["channels"]["M02001311_U1"]["max"] == 238.3
+    assert stats["channels"]["M02001311_Ch1"]["max"] == 4.0
+
+
+@pytest.mark.parametrize("bad_row", [
+    "21/01/26 09:55:00\tabc\t1.0",
+    "21/01/26 09:55:00\t1.0\t2.0\t3.0",
+    "21/01/26 09:55:00\t1.0",
+])
+def test_parse_v003_streamed_falls_back_mid_file(monkeypatch, tmp_path, bad_row):
+    """
+    Vérifie que le lecteur pyarrow en flux, s'il refuse un bloc au milieu
+    du fichier (cellule non numérique, ligne trop longue ou trop courte),
+    reprend la suite sans perdre ni dupliquer de ligne : même résultat que
+    la lecture sans pyarrow.
+    """
+    rows = [f"21/01/26 {8 + i // 60:02d}:{i % 60:02d}:00\t{230 + i / 10}\t{i}.5" for i in range(120)]
+    rows[115] = bad_row
+    content = (
+        "START_HEADER\n"
+        '{"FileVersion":3,"MasterType":"Mono"}\n'
+        "END_HEADER\n"
+        "START_DATA\n"
+        "02001311\t02001311\t02001311\n"
+        "MV_T302_V003\tPh 1 V\tVoie1 W\n"
+        + "\n".join(rows)
+        + "\nEND_DATA\n"
+    )
+    tsv_file = tmp_path / "T302_stream.tsv"
+    tsv_file.write_text(content, encoding="utf-8")
+    parser = core.TSVParserFactory.get_parser("MV_T302_V003")
+
+    monkeypatch.setattr(core, "DATA_BLOCK_SIZE", 512)
+    monkeypatch.setattr(core, "DATA_CHUNK_ROWS", 7)
+    streamed = parser.parse(str(tsv_file), "c", "b", "electrical")
+    monkeypatch.setattr(core, "pa", None)
+    expected = parser.parse(str(tsv_file), "c", "b", "electrical")
+
+    assert streamed[1]["nb_rows"] == 120
+    assert sorted(streamed[0]) == sorted(expected[0])
+    assert streamed[1]["nb_invalid_values"] == expected[1]["nb_invalid_values"]
+
+
+@pytest.mark.parametrize("with_pyarrow", [True, False])
+def test_parse_v003_reads_file_once_and_stops_at_end_data(monkeypatch, tmp_path, with_pyarrow):
+    """
+    Vérifie qu'un fichier V003 (fins de ligne CRLF) est ouvert une seule
+    fois par parser.parse() et que les données s'arrêtent à END_DATA.
+    """
+    if not with_pyarrow:
+        monkeypatch.setattr(core, "pa", None)
+
+    content = (
+        "START_HEADER\r\n"
+        '{"FileVersion":3,"MasterType":"Tri"}\r\n'
+        "END_HEADER\r\n"
+        "START_DATA\r\n"
+        "02001311\t02001311\r\n"
+        "MV_T302_V003\tPh 1 V\r\n"
+        "21/01/26 08:15:24\t236.14\r\n"
+        "21/01/26 08:20:00\t237.0\r\n"
+        "END_DATA\r\n"
+        "21/01/26 08:25:00\t999.0\r\n"
+    )
+    tsv_file = tmp_path / "test.tsv"
+    tsv_file.write_bytes(content.encode("utf-8"))
+
+    opened = []
+    real_open = open
+    monkeypatch.setattr(
+        "builtins.open", lambda path, *a, **kw: opened.append(path) or real_open(path, *a, **kw)
+    )
+
+    parser = core.TSVParserFactory.get_parser("MV_T302_V003")
+    points, stats = parser.parse(str(tsv_file), "campaign_v003", "company_v003", "electrical")
+
+    assert opened == [str(tsv_file)]
+    assert stats["nb_rows"] == 2
+    assert stats["file_header_meta"] == {"FileVersion": 3, "MasterType": "Tri"}
+    assert stats["channels"]["M02001311_U1"]["max"] == 237.0
+    assert [parse_line(p)[3] for p in points] == [1768983324, 1768983600]
+
+
 def test_parse_tsv_data_invalid_timestamp_is_skipped(tmp_path, caplog):
     """
     Vérifie qu'une ligne avec timestamp invalide est ignorée.
@@ -379,12 +622,41 @@ def test_parse_tsv_data_invalid_timestamp_is_skipped(tmp_path, caplog):
     # Une seule ligne valide → 1 point
     assert len(points) == 1
     assert stats["nb_invalid_timestamps"] == 1
+    # Plage temporelle calculée sur les seuls timestamps valides
+    assert stats["time_start"] == stats["time_end"] == "2025-08-03T03:30:00+00:00"
 
     # Vérifie que le warning a bien été loggé
     messages = [rec.getMessage() for rec in caplog.records]
     assert any("Could not parse timestamp" in m for m in messages)
 
 
+def test_invalid_timestamps_logged_once_across_chunks(monkeypatch, tmp_path, caplog):
+    """
+    Vérifie que des timestamps invalides répartis sur plusieurs blocs donnent
+    un seul warning par fichier (compteur + quelques exemples), sans sortie
+    par ligne.
+    """
+    rows = "\n".join(f"    BAD_{i}\t1.0" for i in range(10))
+    content = f"""
+    02001171\t02001171
+    MV_T302_V002\tPh 1 V
+{rows}
+    03/08/25 03:30:00\t243.00
+    """
+    tsv_file = write_tmp_tsv(tmp_path, content)
+    mappings, _ = parse_tsv_header(str(tsv_file))
+    monkeypatch.setattr(core, "DATA_CHUNK_ROWS", 3)
+    caplog.set_level("WARNING", logger="tsv_parser")
+
+    points, stats = parse_tsv_data(str(tsv_file), mappings, "campaign1", "company1", "campaign1")
+
+    assert len(points) == 1
+    assert stats["nb_invalid_timestamps"] == 10
+    assert [rec.getMessage() for rec in caplog.records] == [
+        "Could not parse timestamp on 10 rows (e.g. 'BAD_0', 'BAD_1', 'BAD_2')"
+    ]
+
+
 def test_parse_tsv_data_invalid_value_is_skipped(tmp_path, caplog):
     """
     Vérifie qu'une valeur non numérique est ignorée pour un canal.
@@ -416,6 +688,292 @@ def test_parse_tsv_data_invalid_value_is_skipped(tmp_path, caplog):
     assert any("Invalid value at column" in m for m in messages)
 
 
+def test_parse_tsv_data_short_row_is_tolerated(tmp_path):
+    """
+    Une ligne avec une colonne manquante (refusée par le lecteur pyarrow)
+    doit être lue via le repli pandas : la valeur manquante est invalide.
+    """
+    content = """
+    02001171\t02001171\t02001171
+    MV_T302_V002\tPh 1 V\tPh 2 V
+    03/08/25 03:20:00\t241.5\t242.5
+    03/08/25 03:30:00\t242.0
+    """
+    tsv_file = write_tmp_tsv(tmp_path, content)
+    mappings, _ = parse_tsv_header(str(tsv_file))
+
+    points, stats = parse_tsv_data(
+        str(tsv_file),
+        mappings,
+        campaign="campaign1",
+        bucket_name="company1",
+        table_name="campaign1",
+    )
+
+    assert len(points) == 3
+    assert stats["nb_invalid_values"] == 1
+
+
+def test_parse_tsv_data_by_chunks_matches_single_pass(monkeypatch, tmp_path):
+    """
+    Vérifie que le parsing par blocs de lignes donne les mêmes points et
+    les mêmes statistiques qu'en un seul bloc.
+    """
+    content = """
+    02001171\t02001171\t02001171
+    MV_T302_V002\tPh 1 V\tPh 2 V
+    03/08/25 03:20:00\t241.5\t230.0
+    INVALID_TS\t1.0\t2.0
+    03/08/25 03:10:00\t240.0\tNaN
+    03/08/25 03:30:00\t242.0\t231.0
+    03/08/25 03:40:00\t\t229.0
+    """
+    tsv_file = write_tmp_tsv(tmp_path, content)
+    mappings, _ = parse_tsv_header(str(tsv_file))
+
+    def run():
+        return parse_tsv_data(
+            str(tsv_file),
+            mappings,
+            campaign="campaign1",
+            bucket_name="company1",
+            table_name="campaign1",
+        )
+
+    points, stats = run()
+    monkeypatch.setattr(core, "DATA_CHUNK_ROWS", 2)
+    chunked_points, chunked_stats = run()
+
+    assert sorted(chunked_points) == sorted(points)
+    assert len(points) == 6
+    assert chunked_stats == stats
+    assert stats["time_start"] == "2025-08-03T03:10:00+00:00"
+    assert stats["channels"]["M02001171_U1"]["min"] == 240.0
+    assert stats["channels"]["M02001171_Ch1"]["max"] == 231.0
+
+
+@pytest.mark.parametrize("with_pyarrow", [True, False])
+def test_invalid_values_counted_once_and_skipped(monkeypatch, tmp_path, caplog, with_pyarrow):
+    """
+    Vérifie que les valeurs non numériques, vides ou non finies sont
+    écartées par la conversion vectorisée et résumées dans un seul warning,
+    avec le lecteur pyarrow comme avec pandas.
+    """
+    if not with_pyarrow:
+        monkeypatch.setattr(core, "pa", None)
+
+    content = """
+    02001171\t02001171\t02001171
+    MV_T302_V002\tPh 1 V\tPh 2 V
+    03/08/25 03:10:00\t240.0\tabc
+    03/08/25 03:20:00\t\t230.5
+    03/08/25 03:30:00\tinf\t231.0
+    03/08/25 03:40:00\t242.0\tNaN
+    """
+    tsv_file = write_tmp_tsv(tmp_path, content)
+    mappings, _ = parse_tsv_header(str(tsv_file))
+
+    with caplog.at_level("WARNING", logger="tsv_parser"):
+        points, stats = parse_tsv_data(str(tsv_file), mappings, "campaign1", "company1", "campaign1")
+
+    assert len(points) == 4
+    assert stats["nb_invalid_values"] == 4
+    assert stats["channels"]["M02001171_U1"]["max"] == 242.0
+    warnings = [r.getMessage() for r in caplog.records if "Invalid value" in r.getMessage()]
+    assert warnings == ["Invalid value at columns 1 (2), 2 (2): 4 values ignored"]
+
+
+@pytest.mark.parametrize("with_pyarrow", [True, False])
+def test_format_lines_matches_repr(monkeypatch, with_pyarrow):
+    """
+    Vérifie que les valeurs sont écrites comme repr (sans ".0" final), avec
+    les kernels Arrow comme en Python, y compris aux bornes où Arrow passe
+    en notation exponentielle.
+    """
+    if not with_pyarrow:
+        monkeypatch.setattr(core, "pa", None)
+
+    values = np.array([
+        0.0, -0.0, 1.0, 247.2, -3.5, 0.30000000000000004, 12345678.9,
+        1e-4, 9.999999999999999e-05, 1e-07, 9999999999.999998, 1e10,
+        123456789012345.6, 1e15, 1e16, 5e-324, -1.7976931348623157e308,
+    ])
+    ok = np.ones(len(values), dtype=bool)
+    ok[2] = False
+    epochs = np.arange(1_700_000_000, 1_700_000_000 + len(values), dtype=np.int64)
+
+    lines = core._format_lines("m f=", values[ok], ok, core._timestamp_suffixes(epochs))
+
+    assert lines == [
+        f"m f={repr(v).removesuffix('.0')} {ts}"
+        for v, ts, keep in zip(values.tolist(), epochs.tolist(), ok)
+        if keep
+    ]
+
+
+@pytest.mark.parametrize("with_pyarrow", [True, False])
+def test_parse_tsv_data_keeps_17_significant_digits(monkeypatch, tmp_path, with_pyarrow):
+    """
+    Vérifie que les valeurs à 17 chiffres significatifs sont relues à
+    l'identique (comme float()), pour une colonne numérique comme pour une
+    colonne lue en texte (cellule non numérique), avec pyarrow ou pandas.
+    """
+    if not with_pyarrow:
+        monkeypatch.setattr(core, "pa", None)
+
+    content = """
+    02001171\t02001171\t02001171
+    MV_T302_V002\tPh 1 V\tPh 2 V
+    03/08/25 03:10:00\t0.30000000000000004\tabc
+    03/08/25 03:20:00\t240.10000000000002\t0.30000000000000004
+    03/08/25 03:30:00\t9.999999999999999e-05\t240.10000000000002
+    """
+    tsv_file = write_tmp_tsv(tmp_path, content)
+    mappings, _ = parse_tsv_header(str(tsv_file))
+
+    points, stats = parse_tsv_data(str(tsv_file), mappings, "campaign1", "company1", "campaign1")
+
+    values = [next(iter(parse_line(p)[2].values())) for p in points]
+    assert sorted(values) == sorted([
+        0.30000000000000004, 240.10000000000002, 9.999999999999999e-05,
+        0.30000000000000004, 240.10000000000002,
+    ])
+    assert stats["nb_invalid_values"] == 1
+
+
+@pytest.mark.parametrize("with_pyarrow", [True, False])
+def test_parse_tsv_data_stray_quote_does_not_merge_rows(monkeypatch, tmp_path, with_pyarrow):
+    """
+    Vérifie qu'un guillemet isolé dans une cellule n'est pas interprété
+    comme un début de champ entre guillemets : les lignes suivantes restent
+    des lignes distinctes, seule la cellule fautive est invalide.
+    """
+    if not with_pyarrow:
+        monkeypatch.setattr(core, "pa", None)
+
+    content = """
+    02001171\t02001171
+    MV_T302_V002\tPh 1 V
+    03/08/25 03:10:00\t"240.0
+    03/08/25 03:20:00\t241.0
+    03/08/25 03:30:00\t242.0
+    """
+    tsv_file = write_tmp_tsv(tmp_path, content)
+    mappings, _ = parse_tsv_header(str(tsv_file))
+
+    points, stats = parse_tsv_data(str(tsv_file), mappings, "campaign1", "company1", "campaign1")
+
+    assert stats["nb_rows"] == 3
+    assert len(points) == 2
+    assert stats["nb_invalid_values"] == 1
+
+
+def test_line_prefixes_built_once_per_channel(monkeypatch, tmp_path):
+    """
+    Vérifie que le préfixe de ligne (measurement + tags + field) d'un canal
+    est construit une seule fois par fichier, quel que soit le nombre de
+    blocs de lignes.
+    """
+    content = """
+    02001171\t02001171\t02001171
+    MV_T302_V002\tPh 1 V\tPh 2 V
+    03/08/25 03:10:00\t240.0\t230.0
+    03/08/25 03:20:00\t241.5\t230.5
+    03/08/25 03:30:00\t242.0\t231.0
+    """
+    tsv_file = write_tmp_tsv(tmp_path, content)
+    mappings, _ = parse_tsv_header(str(tsv_file))
+
+    calls = []
+    build_prefix = core._channel_line_prefix
+
+    def counting_prefix(*args, **kwargs):
+        calls.append(args)
+        return build_prefix(*args, **kwargs)
+
+    monkeypatch.setattr(core, "_channel_line_prefix", counting_prefix)
+    monkeypatch.setattr(core, "DATA_CHUNK_ROWS", 1)
+
+    points, _ = parse_tsv_data(str(tsv_file), mappings, "campaign1", "company1", "campaign1")
+
+    assert len(points) == 6
+    assert len(calls) == len(mappings)
+
+
+def test_channel_mappings_cached_per_header(monkeypatch, tmp_path):
+    """
+    Vérifie que deux fichiers au header identique ne construisent les
+    mappings qu'une fois, et que chaque fichier en reçoit sa propre copie.
+    """
+    monkeypatch.setattr(core, "_channel_mappings_cache", {})
+    header = "02001171\t02001171\t02001171\nMV_T302_V002\tPh 1 V\tPh 2 V\n"
+    (tmp_path / "a.tsv").write_text(header + "03/08/25 03:10:00\t240.0\t230.0\n", encoding="utf-8")
+    (tmp_path / "b.tsv").write_text(header + "03/08/25 03:20:00\t241.0\t231.0\n", encoding="utf-8")
+
+    calls = []
+    build = core.MV_T302_V002_Parser.build_channel_mappings
+
+    def counting_build(*args):
+        calls.append(args)
+        return build(*args)
+
+    monkeypatch.setattr(core.MV_T302_V002_Parser, "build_channel_mappings", staticmethod(counting_build))
+
+    parser = core.MV_T302_V002_Parser()
+    first = parser.channel_mappings_for(core.TSVFile.read(str(tmp_path / "a.tsv")))
+    second = parser.channel_mappings_for(core.TSVFile.read(str(tmp_path / "b.tsv")))
+
+    assert len(calls) == 1
+    assert first == second
+    assert first[0] is not second[0]
+
+
+def test_line_protocol_matches_influxdb_client_point():
+    """
+    Vérifie que les lignes émises directement (préfixe par canal) sont celles
+    que produirait influxdb_client.Point : échappement des tags, tags vides
+    omis, format des floats.
+    """
+    from influxdb_client import Point, WritePrecision
+
+    mapping = {
+        "column_idx": 1,
+        "channel_id": "M02001171_U1",
+        "unit": "V",
+        "channel_label": "U1",
+        "channel_name": "Ph 1,a=b",
+        "device": "MV2",
+        "device_type": "master",
+        "device_subtype": "",
+        "device_master_sn": "02001171",
+        "device_sn": None,
+    }
+    frame = {0: np.array(["05/01/26 10:00:00", "05/01/26 10:10:00"], dtype=object), 1: np.array([241.0, 1e-07])}
+
+    lines, _ = core.BaseTSVParser()._parse_frames([frame], [mapping], "camp 1")
+
+    epoch = int(parse_timestamp("05/01/26 10:00:00").timestamp())
+    expected = []
+    for ts, value in ((epoch, 241.0), (epoch + 600, 1e-07)):
+        point = Point("electrical").field("M02001171_U1_V", value).time(ts, WritePrecision.S)
+        for key, val in {
+            "campaign": "camp 1",
+            "channel_id": "M02001171_U1",
+            "channel_unit": "V",
+            "channel_label": "U1",
+            "channel_name": "Ph 1,a=b",
+            "device": "MV2",
+            "device_type": "master",
+            "device_subtype": "",
+            "device_master_sn": "02001171",
+            "device_sn": None,
+        }.items():
+            point.tag(key, val)
+        expected.append(point.to_line_protocol())
+
+    assert lines == expected
+
+
 # ---------------------------------------------------------------------------
 # Test d'intégration : parsing de toutes les colonnes du fichier réel
 # ---------------------------------------------------------------------------
@@ -478,19 +1036,45 @@ def test_full_file_parsing_all_columns():
     # - measurement correct
     # - tags cohérents
     # - aucune valeur None
-    for p in points[:10]:  # on échantillonne quelques points pour ne pas tout parcourir
-        assert p._name == "electrical"
-        tags = dict(p._tags)
+    for line in points[:10]:  # on échantillonne quelques points pour ne pas tout parcourir
+        name, tags, fields, _ts = parse_line(line)
+        assert name == "electrical"
         assert tags["campaign"] == "campaign1"
         assert "channel_id" in tags
         assert "channel_name" in tags
         assert "device_sn" in tags
         assert "channel_unit" in tags
-        fields = dict(p._fields)
         assert len(fields) == 1
         assert list(fields.values())[0] is not None
 
 
+def test_time_range_v003_unordered(tmp_path):
+    """
+    Vérifie que la plage temporelle calculée par le parser ignore le header
+    V003 et les lignes invalides, et ne dépend pas de l'ordre des lignes.
+    """
+    content = """
+    START_HEADER
+    {"FileVersion":3,"MasterType":"Mono"}
+    END_HEADER
+    START_DATA
+    02001311\t02001311
+    MV_T302_V003\tPh 1 V
+    21/01/26 08:20:00\t237.00
+    INVALID_TS\t1.0
+    21/01/26 08:15:24\t236.14
+    21/01/26 09:00:00\t236.50
+    END_DATA
+    """
+    tsv_file = write_tmp_tsv(tmp_path, content)
+
+    parser = core.TSVParserFactory.get_parser("MV_T302_V003")
+    _, stats = parser.parse(str(tsv_file), "campaign_v003", "company_v003", "electrical")
+
+    assert stats["time_start"] == "2026-01-21T08:15:24+00:00"
+    assert stats["time_end"] == "2026-01-21T09:00:00+00:00"
+
+
 # ---------------------------------------------------------------------------
 # Tests pour extract_path_components
 # ---------------------------------------------------------------------------
@@ -555,6 +1139,70 @@ def test_find_tsv_files_excludes_parsed_and_error(tmp_path):
     assert "ERROR_d.tsv" not in basenames
 
 
+def test_find_tsv_files_skips_symlinked_dirs_and_non_tsv(tmp_path):
+    """
+    Vérifie que le parcours (os.scandir) ne suit pas les liens symboliques
+    vers des dossiers (pas de boucle) et ne retient que les fichiers .tsv.
+    """
+    base = tmp_path / "data"
+    device = base / "company1" / "campaign" / "02001171"
+    device.mkdir(parents=True)
+    (device / "a.tsv").write_text("x", encoding="utf-8")
+    (device / "notes.txt").write_text("y", encoding="utf-8")
+    (device / "dir.tsv").mkdir()
+    (device / "loop").symlink_to(base, target_is_directory=True)
+
+    files = list(_find_tsv_files(str(base)))
+
+    assert files == [str(device / "a.tsv")]
+
+
+def test_find_tsv_files_skips_unreadable_dir(monkeypatch, tmp_path, caplog):
+    """
+    Vérifie qu'un dossier illisible (ou supprimé pendant le parcours) est
+    ignoré avec un warning, sans arrêter la recherche dans les autres.
+    """
+    base = tmp_path / "data"
+    locked = base / "company1" / "locked"
+    device = base / "company1" / "campaign" / "02001171"
+    locked.mkdir(parents=True)
+    device.mkdir(parents=True)
+    (locked / "hidden.tsv").write_text("x", encoding="utf-8")
+    (device / "a.tsv").write_text("x", encoding="utf-8")
+
+    scandir = os.scandir
+
+    def failing_scandir(path):
+        if path == str(locked):
+            raise PermissionError(13, "Permission denied", path)
+        return scandir(path)
+
+    monkeypatch.setattr("fs_utils.os.scandir", failing_scandir)
+
+    with caplog.at_level("WARNING", logger="tsv_parser"):
+        files = list(_find_tsv_files(str(base)))
+
+    assert files == [str(device / "a.tsv")]
+    assert any(str(locked) in m for m in caplog.messages)
+
+
+def test_prefetch_in_thread_preserves_order_and_errors():
+    """
+    Vérifie que le parcours en tâche de fond restitue les éléments dans
+    l'ordre et relance l'erreur du producteur côté consommateur.
+    """
+    assert list(tsv_parser._prefetch_in_thread(iter(range(100)), maxsize=4)) == list(range(100))
+
+    def failing():
+        yield "a.tsv"
+        raise PermissionError("denied")
+
+    it = tsv_parser._prefetch_in_thread(failing())
+    assert next(it) == "a.tsv"
+    with pytest.raises(PermissionError):
+        next(it)
+
+
 # ---------------------------------------------------------------------------
 # Tests pour move_parsed_file / move_error_file
 # ---------------------------------------------------------------------------
@@ -567,7 +1215,7 @@ def test_move_parsed_file(tmp_path, caplog):
     file_path = tmp_path / "T302_251012_031720.tsv"
     file_path.write_text("dummy", encoding="utf-8")
 
-    caplog.set_level("INFO", logger="tsv_parser")
+    caplog.set_level("DEBUG", logger="tsv_parser")
 
     _move_parsed_file(str(file_path))
 
@@ -588,7 +1236,7 @@ def test_move_error_file(tmp_path, caplog):
     file_path = tmp_path / "T302_251012_031720.tsv"
     file_path.write_text("dummy", encoding="utf-8")
 
-    caplog.set_level("INFO", logger="tsv_parser")
+    caplog.set_level("DEBUG", logger="tsv_parser")
 
     _move_error_file(str(file_path))
 
@@ -601,6 +1249,27 @@ def test_move_error_file(tmp_path, caplog):
     assert any("Moved error file to:" in m for m in messages)
 
 
+def test_move_parsed_file_recreates_removed_dir(tmp_path):
+    """
+    Vérifie que le dossier parsed/ (créé une fois puis mémorisé) est recréé
+    s'il a été supprimé entre deux déplacements, et qu'un fichier absent
+    lève toujours FileNotFoundError.
+    """
+    first = tmp_path / "a.tsv"
+    second = tmp_path / "b.tsv"
+    first.write_text("x", encoding="utf-8")
+    second.write_text("y", encoding="utf-8")
+
+    _move_parsed_file(str(first))
+    (tmp_path / "parsed" / "a.tsv").unlink()
+    (tmp_path / "parsed").rmdir()
+    _move_parsed_file(str(second))
+
+    assert (tmp_path / "parsed" / "b.tsv").read_text(encoding="utf-8") == "y"
+    with pytest.raises(FileNotFoundError):
+        _move_parsed_file(str(tmp_path / "missing.tsv"))
+
+
 # ---------------------------------------------------------------------------
 # Tests pour setup_influxdb_client (mock)
 # ---------------------------------------------------------------------------
@@ -638,10 +1307,13 @@ class DummyClient:
         def __init__(self, parent):
             self.parent = parent
 
-        def write(self, bucket, org, record):
+        def write(self, bucket, org, record, write_precision=None):
             self.parent.written.append((bucket, org, record))
 
-    def write_api(self, write_options=None):
+        def close(self):
+            pass
+
+    def write_api(self, write_options=None, **kwargs):
         return DummyClient.DummyWriteAPI(self)
 
     def close(self):
@@ -670,7 +1342,7 @@ def test_create_bucket_if_not_exists_creates(monkeypatch):
     assert len(buckets2) == 1
 
 
-def test_process_tsv_file_writes_points(monkeypatch, tmp_path, capsys):
+def test_process_tsv_file_writes_points(monkeypatch, tmp_path, caplog):
     """
     Vérifie que process_tsv_file appelle bien l'API d'écriture Influx.
     """
@@ -689,22 +1361,443 @@ def test_process_tsv_file_writes_points(monkeypatch, tmp_path, capsys):
     client = DummyClient()
     org = "my-org"
 
-    ok, file_report = tsv_parser.process_tsv_file(str(tsv_file), str(base_folder), client, org)
+    with caplog.at_level("DEBUG", logger="tsv_parser"):
+        ok, file_report = tsv_parser.process_tsv_file(str(tsv_file), str(base_folder), client, org)
 
     assert ok is True
     assert file_report["status"] == "success"
     assert file_report["nb_points"] == 1
 
-    # Un seul appel à write, avec des points non vides
+    # Un seul appel à write, avec des lignes non vides
     assert len(client.written) == 1
     bucket, written_org, record = client.written[0]
     assert bucket == "company1"
     assert written_org == "my-org"
-    assert isinstance(record, list)
-    assert len(record) == 1
+    # Lot de lignes déjà encodé (bytes, une ligne par point)
+    assert isinstance(record, bytes)
+    assert len(record.decode("utf-8").split("\n")) == 1
+
+    assert "  ✓ Successfully written to InfluxDB" in caplog.messages
+
+
+def test_process_tsv_file_without_points_skips_influx_check(monkeypatch, tmp_path, caplog):
+    """
+    Vérifie qu'un fichier sans point (aucun timestamp valide) ne déclenche
+    ni requête de vérification Influx ni warning "Impossible de vérifier".
+    """
+    base_folder = tmp_path / "data"
+    tsv_dir = base_folder / "company1" / "campaign1" / "02001084"
+    tsv_dir.mkdir(parents=True)
+
+    content = """
+    02001084\t02001084
+    MV_T302_V002\tPh 1 V
+    INVALID_TS\t242.25
+    """
+    tsv_file = write_tmp_tsv(tsv_dir, content)
+
+    def unexpected_count(**kwargs):
+        raise AssertionError("count_points_for_file ne doit pas être appelé")
+
+    monkeypatch.setattr(tsv_parser, "count_points_for_file", unexpected_count)
+
+    with caplog.at_level("WARNING", logger="tsv_parser"):
+        ok, file_report = tsv_parser.process_tsv_file(str(tsv_file), str(base_folder), DummyClient(), "my-org")
+
+    assert ok is True
+    assert file_report["nb_points"] == 0
+    assert not any("Impossible de vérifier" in m for m in caplog.messages)
+
+
+def test_create_bucket_if_not_exists_caches_known_buckets():
+    """
+    Vérifie que la liste des buckets n'est redemandée au serveur que pour un
+    bucket inconnu, et que le cache est propre à chaque client.
+    """
+    client = DummyClient()
+    client.buckets_api().create_bucket("existing", "my-org")
+
+    calls = []
+    find_buckets = client.buckets_api().find_buckets
+
+    def counting_find_buckets():
+        calls.append(1)
+        return find_buckets()
+
+    client.buckets_api().find_buckets = counting_find_buckets
+
+    influx_utils.create_bucket_if_not_exists(client, "company1", "my-org")
+    assert len(calls) == 1
+
+    # Bucket créé ou déjà listé : pas de nouvel aller-retour
+    influx_utils.create_bucket_if_not_exists(client, "company1", "my-org")
+    influx_utils.create_bucket_if_not_exists(client, "existing", "my-org")
+    assert len(calls) == 1
+    assert [b.name for b in client.buckets_api()._buckets] == ["existing", "company1"]
+
+    # Un autre client ne réutilise pas ce cache
+    other = DummyClient()
+    influx_utils.create_bucket_if_not_exists(other, "company1", "my-org")
+    assert [b.name for b in other.buckets_api()._buckets] == ["company1"]
+
+
+def test_iter_written_files_threads_keep_order_and_archive(tmp_path):
+    """
+    Vérifie qu'avec plusieurs threads d'écriture les rapports restent dans
+    l'ordre des fichiers, que le bucket n'est créé qu'une fois et que les
+    fichiers sont déplacés dans parsed/ ou error/.
+    """
+    base_folder = tmp_path / "data"
+    tsv_dir = base_folder / "company1" / "campaign1" / "02001084"
+    tsv_dir.mkdir(parents=True)
+
+    tsv_files = []
+    for i in range(5):
+        path = tsv_dir / f"T302_25080{i}.tsv"
+        path.write_text(
+            "02001084\t02001084\nMV_T302_V002\tPh 1 V\n03/08/25 03:20:00\t242.25\n",
+            encoding="utf-8",
+        )
+        tsv_files.append(str(path))
+    broken = tsv_dir / "T302_broken.tsv"
+    broken.write_text("", encoding="utf-8")
+    tsv_files.insert(2, str(broken))
+
+    client = DummyClient()
+    parsed_files = tsv_parser._iter_parsed_files(tsv_files, str(base_folder), workers=1)
+    results = list(
+        tsv_parser._iter_written_files(parsed_files, str(base_folder), client, "my-org", 3)
+    )
+
+    assert [r["file_path"] for _, r in results] == tsv_files
+    assert [ok for ok, _ in results] == [True, True, False, True, True, True]
+    assert len(client.buckets_api().find_buckets().buckets) == 1
+    assert len(list((tsv_dir / "parsed").iterdir())) == 5
+    assert (tsv_dir / "error" / "T302_broken.tsv").exists()
+
+
+def test_iter_written_files_shared_write_api_routes_each_bucket(tmp_path):
+    """
+    Vérifie qu'avec un WriteApi partagé par les threads d'écriture, chaque
+    fichier est écrit dans le bucket de sa company (bucket passé à chaque
+    appel, aucun état de destination partagé).
+    """
+    base_folder = tmp_path / "data"
+    tsv_files = []
+    for i in range(8):
+        tsv_dir = base_folder / f"company{i % 2}" / "campaign1" / "02001084"
+        tsv_dir.mkdir(parents=True, exist_ok=True)
+        path = tsv_dir / f"T302_25080{i}.tsv"
+        path.write_text(
+            f"02001084\t02001084\nMV_T302_V002\tPh 1 V\n03/08/25 03:20:00\t{i}.5\n",
+            encoding="utf-8",
+        )
+        tsv_files.append(str(path))
+
+    client = DummyClient()
+    write_api = client.write_api()
+    parsed_files = tsv_parser._iter_parsed_files(tsv_files, str(base_folder), workers=1)
+    results = list(
+        tsv_parser._iter_written_files(
+            parsed_files, str(base_folder), client, "my-org", 4, write_api=write_api
+        )
+    )
+
+    assert all(ok for ok, _ in results)
+    assert len(client.written) == 8
+    for bucket, _, record in client.written:
+        value = float(record.decode("utf-8").split("=")[-1].split(" ")[0])
+        assert bucket == f"company{int(value) % 2}"
+
+
+def test_iter_parsed_files_workers_are_not_forked(tmp_path):
+    """
+    Vérifie que les workers de parsing ne sont pas forkés depuis le process
+    principal (qui a déjà des threads) et qu'ils parsent bien les fichiers.
+    """
+    assert tsv_parser._PARSE_MP_CONTEXT.get_start_method() != "fork"
+
+    base_folder = tmp_path / "data"
+    tsv_dir = base_folder / "company1" / "campaign1" / "02001084"
+    tsv_dir.mkdir(parents=True)
+    tsv_files = []
+    for i in range(3):
+        path = tsv_dir / f"T302_25080{i}.tsv"
+        path.write_text(
+            "02001084\t02001084\nMV_T302_V002\tPh 1 V\n03/08/25 03:20:00\t242.25\n",
+            encoding="utf-8",
+        )
+        tsv_files.append(str(path))
+
+    results = list(tsv_parser._iter_parsed_files(tsv_files, str(base_folder), workers=2))
+
+    assert [tsv_file for tsv_file, _ in results] == tsv_files
+    assert all(ok and report["nb_points"] == 1 for _, (ok, report, _) in results)
+
+
+_parse_tsv_file = tsv_parser.parse_tsv_file
+
+
+def _parse_or_kill_worker(tsv_file, base_folder):
+    """
+    parse_tsv_file qui tue brutalement son worker sur les fichiers "crash".
+    """
+    if "crash" in Path(tsv_file).name:
+        os._exit(1)
+    return _parse_tsv_file(tsv_file, base_folder)
+
+
+def test_iter_parsed_files_dead_worker_fails_only_its_file(monkeypatch, tmp_path):
+    """
+    Vérifie qu'un worker de parsing qui meurt (os._exit) ne casse pas le run :
+    seul son fichier est en erreur (déplacé dans error/), les autres fichiers
+    en cours au même moment sont reparsés et écrits, dans l'ordre.
+    """
+    # Workers forkés pour qu'ils héritent du monkeypatch de parse_tsv_file
+    monkeypatch.setattr(tsv_parser, "_PARSE_MP_CONTEXT", multiprocessing.get_context("fork"))
+    monkeypatch.setattr(tsv_parser, "parse_tsv_file", _parse_or_kill_worker)
+
+    base_folder = tmp_path / "data"
+    tsv_dir = base_folder / "company1" / "campaign1" / "02001084"
+    tsv_dir.mkdir(parents=True)
+    tsv_files = []
+    for name in ["T302_a", "T302_b", "T302_crash", "T302_c", "T302_d", "T302_e", "T302_f"]:
+        path = tsv_dir / f"{name}.tsv"
+        path.write_text(
+            "02001084\t02001084\nMV_T302_V002\tPh 1 V\n03/08/25 03:20:00\t242.25\n",
+            encoding="utf-8",
+        )
+        tsv_files.append(str(path))
+
+    client = DummyClient()
+    parsed_files = tsv_parser._iter_parsed_files(tsv_files, str(base_folder), workers=2)
+    results = list(
+        tsv_parser._iter_written_files(parsed_files, str(base_folder), client, "my-org", 1)
+    )
+
+    assert [r["file_path"] for _, r in results] == tsv_files
+    assert [ok for ok, _ in results] == [True, True, False, True, True, True, True]
+    assert len(client.written) == 6
+    assert sorted(p.name for p in (tsv_dir / "error").iterdir()) == ["T302_crash.tsv"]
+    assert len(list((tsv_dir / "parsed").iterdir())) == 6
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_write_run_report_to_file(monkeypatch, tmp_path, use_orjson):
+    """
+    Vérifie que le rapport JSON est écrit dans TSV_REPORT_DIR, nommé d'après
+    le run_id (sans ':'), et relisible tel quel, avec orjson comme avec le
+    repli json.
+    """
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(tsv_parser, "orjson", None)
+    monkeypatch.setenv("TSV_REPORT_DIR", str(tmp_path / "reports"))
+    run_id = "2026-01-01T10:00:00+00:00"
+    report = {
+        "run_id": run_id,
+        "duration_s": 1.5,
+        "files": [{"campaign": "été", "channels": {"M1_U1": {"min": None, "nb_points": 3}}}],
+    }
+
+    tsv_parser.write_run_report_to_file(report, str(tmp_path), run_id)
+
+    path = tmp_path / "reports" / "tsv_parser_2026-01-01T10-00-00+00-00.json"
+    assert path.exists()
+    assert json.loads(path.read_text(encoding="utf-8")) == report
+
+
+def test_write_points_udp_transport(monkeypatch):
+    """
+    Vérifie qu'avec INFLUX_WRITE_TRANSPORT=udp les lignes sont envoyées en
+    datagrammes (sous UDP_MAX_PAYLOAD) sans passer par l'API HTTP.
+    """
+    import socket
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as server:
+        server.bind(("127.0.0.1", 0))
+        server.settimeout(2)
+        monkeypatch.setenv("INFLUX_WRITE_TRANSPORT", "udp")
+        monkeypatch.setenv("INFLUX_UDP_HOST", "127.0.0.1")
+        monkeypatch.setenv("INFLUX_UDP_PORT", str(server.getsockname()[1]))
+
+        lines = [f"electrical,channel_id=M1_U{i} M1_U{i}_V=230.{i} 1700000000" for i in range(100)]
+        client = DummyClient()
+        influx_utils.write_points(client, "company1", "my-org", lines)
+
+        received = []
+        while sum(len(d.split(b"\n")) for d in received) < len(lines):
+            data = server.recv(65535)
+            assert len(data) <= influx_utils.UDP_MAX_PAYLOAD
+            received.append(data)
+
+    assert b"\n".join(received).decode("utf-8").split("\n") == lines
+    assert client.written == []
+
+
+def test_write_points_rejects_unknown_transport(monkeypatch):
+    monkeypatch.setenv("INFLUX_WRITE_TRANSPORT", "flight")
+
+    with pytest.raises(ValueError):
+        influx_utils.write_points(DummyClient(), "company1", "my-org", ["m f=1 1"])
+
+
+def test_parse_tsv_encodes_batches_per_block(monkeypatch, tmp_path):
+    """
+    Vérifie que parse_tsv_file encode les lignes bloc par bloc (jamais plus
+    d'un bloc de lignes à la fois) et que les lots contiennent exactement
+    les lignes du parsing non encodé.
+    """
+    base_folder = tmp_path / "data"
+    tsv_dir = base_folder / "company1" / "campaign1" / "02001171"
+    tsv_dir.mkdir(parents=True)
+    rows = "".join(f"03/08/25 03:{m:02d}:00\t{240 + m}.5\t{230 + m}.0\n" for m in range(5))
+    tsv_file = tsv_dir / "test.tsv"
+    tsv_file.write_text("02001171\t02001171\t02001171\nMV_T302_V002\tPh 1 V\tPh 2 V\n" + rows, encoding="utf-8")
+
+    monkeypatch.setattr(core, "DATA_CHUNK_ROWS", 2)
+    mappings, _ = parse_tsv_header(str(tsv_file))
+    points, _ = parse_tsv_data(str(tsv_file), mappings, "campaign1", "company1", "campaign1")
+
+    encoded_sizes = []
+    encode = influx_utils.encode_batches
+
+    def counting_encode(lines):
+        encoded_sizes.append(len(lines))
+        return encode(lines)
+
+    monkeypatch.setattr(tsv_parser, "encode_batches", counting_encode)
+
+    ok, file_report, batches = tsv_parser.parse_tsv_file(str(tsv_file), str(base_folder))
+
+    assert ok is True
+    assert encoded_sizes == [4, 4, 2]
+    assert file_report["nb_points"] == 10
+    assert b"\n".join(batches).decode("utf-8").split("\n") == points
+
+
+def test_encode_batches_splits_by_write_batch_size(monkeypatch):
+    """
+    Vérifie que les lignes sont regroupées en lots encodés de
+    WRITE_BATCH_SIZE lignes, un lot par requête d'écriture.
+    """
+    monkeypatch.setattr(influx_utils, "WRITE_BATCH_SIZE", 2)
+    lines = [f"m f={i} {i}" for i in range(5)]
+
+    batches = influx_utils.encode_batches(lines)
+    assert batches == [b"m f=0 0\nm f=1 1", b"m f=2 2\nm f=3 3", b"m f=4 4"]
+
+    client = DummyClient()
+    influx_utils.write_batches(client, "company1", "my-org", batches)
+    assert [record for _, _, record in client.written] == batches
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [("", 10_000), ("5000", 5000), ("0", 10_000), ("-5", 10_000), ("10k", 10_000)],
+)
+def test_write_batch_size_from_env(monkeypatch, caplog, raw, expected):
+    """
+    Vérifie que INFLUX_BATCH_SIZE n'est retenu que s'il est entier et > 0,
+    sinon la valeur par défaut est utilisée avec un warning.
+    """
+    monkeypatch.setenv("INFLUX_BATCH_SIZE", raw)
+
+    with caplog.at_level("WARNING", logger="tsv_parser"):
+        assert influx_utils._get_write_batch_size() == expected
+
+    assert any("INFLUX_BATCH_SIZE" in m for m in caplog.messages) == (raw not in ("", "5000"))
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [("", 4), ("8", 8), ("0", 4), ("-2", 4), ("4x", 4)],
+)
+def test_workers_from_env(monkeypatch, caplog, raw, expected):
+    """
+    Vérifie que TSV_PARSE_WORKERS / TSV_WRITE_WORKERS ne sont retenus que
+    s'ils sont entiers et > 0, sinon la valeur par défaut est utilisée avec
+    un warning.
+    """
+    monkeypatch.setenv("TSV_WRITE_WORKERS", raw)
+
+    with caplog.at_level("WARNING", logger="tsv_parser"):
+        assert tsv_parser._get_workers_from_env("TSV_WRITE_WORKERS", 4) == expected
+
+    assert any("TSV_WRITE_WORKERS" in m for m in caplog.messages) == (raw not in ("", "8"))
+
+
+@pytest.mark.parametrize("option", ["-w", "--workers", "--writeWorkers"])
+@pytest.mark.parametrize("value", ["0", "-1", "4x"])
+def test_main_rejects_invalid_worker_option(monkeypatch, tmp_path, option, value):
+    """
+    Vérifie que les options de nombre de workers refusent les valeurs non
+    entières ou <= 0 (erreur argparse, code 2).
+    """
+    monkeypatch.setattr(sys, "argv", ["tsv_parser.py", "-d", str(tmp_path), "--dry-run", option, value])
+
+    with pytest.raises(SystemExit) as exc_info:
+        tsv_parser.main()
+
+    assert exc_info.value.code == 2
+
+
+def test_write_points_reuses_given_write_api():
+    """
+    Vérifie que write_points écrit via le WriteApi fourni sans en recréer un.
+    """
+    class NoWriteApiClient(DummyClient):
+        def write_api(self, write_options=None, **kwargs):
+            raise AssertionError("write_api ne doit pas être recréé")
+
+    client = NoWriteApiClient()
+    shared = DummyClient.DummyWriteAPI(client)
+
+    influx_utils.write_points(client, "company1", "my-org", ["m f=1 1"], write_api=shared)
+
+    assert client.written == [("company1", "my-org", b"m f=1 1")]
+
+
+class FlakyWriteAPI:
+    """
+    WriteApi factice qui échoue avec les erreurs données avant de réussir.
+    """
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def write(self, bucket, org, record, write_precision=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+def test_write_batches_retries_transient_errors(monkeypatch):
+    """
+    Vérifie que les écritures sont rejouées sur 503 / erreur réseau, en
+    respectant Retry-After, et qu'une erreur 400 n'est pas rejouée.
+    """
+    from influxdb_client.rest import ApiException
+    from urllib3.exceptions import NewConnectionError
+
+    sleeps: List[float] = []
+    monkeypatch.setattr(influx_utils.time, "sleep", sleeps.append)
+    monkeypatch.setattr(influx_utils, "WRITE_RETRY_JITTER", 0)
+
+    busy = ApiException(status=503)
+    busy.headers = {"Retry-After": "2"}
+    flaky = FlakyWriteAPI([busy, NewConnectionError(None, "refused")])
+    influx_utils.write_batches(DummyClient(), "company1", "my-org", [b"m f=1 1"], write_api=flaky)
+
+    assert flaky.calls == 3
+    assert sleeps == [2.0, influx_utils.WRITE_RETRY_INTERVAL * 2]
 
-    captured = capsys.readouterr()
-    assert "Successfully written to InfluxDB" in captured.out
+    rejected = FlakyWriteAPI([ApiException(status=400)])
+    with pytest.raises(ApiException):
+        influx_utils.write_batches(DummyClient(), "company1", "my-org", [b"m f=1 1"], write_api=rejected)
+    assert rejected.calls == 1
 
 
 def test_setup_influxdb_client_missing_env(monkeypatch):
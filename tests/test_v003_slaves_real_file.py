@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Tuple
@@ -20,18 +21,33 @@ def _epoch_s(ts: str) -> int:
     return int(dt.timestamp())
 
 
+def _unescape(s: str) -> str:
+    return re.sub(r"\\(.)", r"\1", s)
+
+
+def _parse_line(line: str) -> Tuple[Dict[str, str], str, float, int]:
+    """
+    Découpe une ligne de line protocol en (tags, field_name, value, epoch_seconds).
+    """
+    head, field_set, ts = re.split(r"(?<!\\) ", line)
+    _measurement, *tag_parts = re.split(r"(?<!\\),", head)
+    tags = dict(
+        tuple(_unescape(x) for x in re.split(r"(?<!\\)=", part, maxsplit=1))
+        for part in tag_parts
+    )
+    field_name, value = re.split(r"(?<!\\)=", field_set, maxsplit=1)
+    return tags, _unescape(field_name), float(value), int(ts)
+
+
 def _index_points_by_time_and_field(points) -> Dict[Tuple[int, str], float]:
     """
-    Indexe les points InfluxDB par (epoch_seconds, field_name) -> value.
-    Hypothèse : chaque Point a exactement 1 field (c'est le cas du parseur).
+    Indexe les lignes de line protocol par (epoch_seconds, field_name) -> value.
+    Hypothèse : chaque ligne a exactement 1 field (c'est le cas du parseur).
     """
     out: Dict[Tuple[int, str], float] = {}
-    for p in points:
-        assert isinstance(p._time, int)
-        fields = dict(p._fields)
-        assert len(fields) == 1
-        field_name, value = next(iter(fields.items()))
-        out[(p._time, field_name)] = value
+    for line in points:
+        _tags, field_name, value, ts = _parse_line(line)
+        out[(ts, field_name)] = value
     return out
 
 
@@ -115,8 +131,7 @@ def test_v003_tri_with_slaves_real_file_header_and_points_and_values():
     assert idx[(t0, "M02000800_S04001002_Ch6_W")] == pytest.approx(-6.6)
 
     # Vérifie aussi que les tags essentiels sont présents et cohérents sur un point
-    sample = points[0]
-    tags = dict(sample._tags)
+    tags, _field_name, _value, _ts = _parse_line(points[0])
     assert tags["campaign"] == "campaign_test"
     assert tags["device_master_sn"] == "02000800"
     assert "device_sn" in tags
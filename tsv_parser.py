@@ -7,18 +7,29 @@ Recursively parses TSV files and loads data into InfluxDB buckets.
 import argparse
 import json
 import logging
+import multiprocessing
 import os
+import queue
 import sys
-import time
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Deque, Iterable, Iterator, Optional
 
 import requests
 from dotenv import load_dotenv
 from influxdb_client import InfluxDBClient
+from influxdb_client.client.write_api import SYNCHRONOUS, WriteApi
 
-from core import TSVParserFactory, parse_tsv_header, parse_timestamp
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : repli sur json (stdlib)
+    orjson = None
+
+from core import TSVFile, TSVParserFactory
 from fs_utils import (
     extract_path_components as _extract_path_components,
     find_tsv_files,
@@ -28,7 +39,8 @@ from fs_utils import (
 from influx_utils import (
     setup_influxdb_client,
     create_bucket_if_not_exists,
-    write_points,
+    encode_batches,
+    write_batches,
     write_run_summary_to_influx,
     count_points_for_file,
 )
@@ -43,11 +55,12 @@ load_dotenv()
 logger = logging.getLogger("tsv_parser")
 
 
-def setup_logging() -> None:
+def setup_logging(verbose: bool = False) -> None:
     """
     Configure le logging de base.
 
-    - Niveau par défaut : INFO (surchageable via TSV_LOG_LEVEL)
+    - Niveau par défaut : INFO (surchageable via TSV_LOG_LEVEL), DEBUG si
+      verbose (option --verbose) : le détail par fichier n'est logué qu'en DEBUG
     - Format simple avec timestamp / niveau / message
 
     On évite d'empiler plusieurs handlers si le logging est déjà configuré
@@ -55,7 +68,7 @@ def setup_logging() -> None:
     """
     root_logger = logging.getLogger()
     level_name = os.getenv("TSV_LOG_LEVEL", "INFO").upper()
-    level = getattr(logging, level_name, logging.INFO)
+    level = logging.DEBUG if verbose else getattr(logging, level_name, logging.INFO)
 
     if root_logger.handlers:
         # Logging déjà configuré ailleurs : on ajuste juste le niveau
@@ -130,56 +143,21 @@ def _publish_channels_to_config_api(
         )
 
 
-def _compute_time_range_from_tsv(tsv_file: str) -> Tuple[str, str]:
-    """
-    Relit le fichier TSV (colonne 0) pour calculer la plage temporelle
-    min / max des timestamps valides, et retourne deux timestamps ISO 8601 (UTC).
-
-    On réutilise la même logique de parsing de dates que dans core.py.
-    """
-    times: List[datetime] = []
-
-    with open(tsv_file, "r", encoding="utf-8") as f:
-        # Pour les fichiers V003, il peut y avoir un header JSON + START_DATA.
-        # On lit tout le fichier et on ne garde que les lignes de données
-        # (parse_timestamp retournera None pour les autres).
-        for line in f:
-            parts = line.rstrip("\n").split("\t")
-            if not parts:
-                continue
-            timestamp_str = str(parts[0])
-
-            ts = parse_timestamp(timestamp_str)
-            if ts is None:
-                continue
-
-            times.append(ts)
-
-    if not times:
-        raise ValueError("Aucun timestamp valide trouvé dans le fichier pour calculer la plage temporelle")
-
-    start_dt = min(times)
-    end_dt = max(times)
-
-    # On les rend explicites en UTC
-    start_iso = start_dt.replace(tzinfo=timezone.utc).isoformat()
-    end_iso = end_dt.replace(tzinfo=timezone.utc).isoformat()
-    return start_iso, end_iso
+# Compteurs retournés par parser.parse() et recopiés tels quels dans le rapport
+_STATS_KEYS = (
+    "nb_rows",
+    "nb_channels",
+    "nb_points",
+    "nb_invalid_timestamps",
+    "nb_invalid_values",
+)
 
 
-def process_tsv_file(
-    tsv_file: str,
-    base_folder: str,
-    client: InfluxDBClient,
-    org: str,
-) -> Tuple[bool, Dict[str, Any]]:
+def _new_file_report(tsv_file: str) -> Dict[str, Any]:
     """
-    Traite un fichier TSV et écrit les points dans InfluxDB.
-
-    Retourne:
-        (success: bool, file_report: dict)
+    Rapport vierge pour un fichier (rempli au fil du traitement).
     """
-    file_report: Dict[str, Any] = {
+    return {
         "file_path": tsv_file,
         "bucket": None,
         "campaign": None,
@@ -199,8 +177,21 @@ def process_tsv_file(
         "time_end": None,
     }
 
+
+def parse_tsv_file(tsv_file: str, base_folder: str) -> Tuple[bool, Dict[str, Any], List[bytes]]:
+    """
+    Partie CPU du traitement d'un fichier : lecture, parsing et émission du
+    line protocol, regroupé en lots encodés prêts à écrire (cf.
+    encode_batches). N'accède pas à InfluxDB, ce qui permet de l'exécuter
+    dans un process worker (le résultat est picklable).
+
+    Retourne:
+        (success: bool, file_report: dict, batches: list[bytes])
+    """
+    file_report = _new_file_report(tsv_file)
+
     try:
-        logger.info("Processing: %s", tsv_file)
+        logger.debug("Processing: %s", tsv_file)
 
         # Extraction des composants de chemin
         bucket_name, campaign_name, device_master_sn = _extract_path_components(
@@ -211,99 +202,124 @@ def process_tsv_file(
         file_report["campaign"] = campaign_name
         file_report["device_master_sn"] = device_master_sn
 
-        # S'assure que le bucket existe
-        create_bucket_if_not_exists(client, bucket_name, org)
-
-        # Lecture rapide du header pour récupérer le format
-        with open(tsv_file, "r", encoding="utf-8") as f:
-            first = f.readline().strip()
-            if first == "START_HEADER":
-                for line in f:
-                    line = line.strip()
-                    if line == "START_DATA":
-                        _line1 = f.readline().strip().split("\t")
-                        line2 = f.readline().strip().split("\t")
-                        break
-            else:
-                _line1 = first.split("\t")
-                line2 = f.readline().strip().split("\t")
-        file_format = line2[0]
+        # Lecture unique du fichier : header (format + mappings) et données
+        tsv = TSVFile.read(tsv_file)
+        file_format = tsv.file_format
 
-        logger.info("  Bucket: %s", bucket_name)
-        logger.info("  Campaign: %s", campaign_name)
-        logger.info("  Master device: %s", device_master_sn)
-        logger.info("  File format: %s", file_format)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Bucket: %s", bucket_name)
+            logger.debug("  Campaign: %s", campaign_name)
+            logger.debug("  Master device: %s", device_master_sn)
+            logger.debug("  File format: %s", file_format)
 
         # Parser adapté au format
         parser = TSVParserFactory.get_parser(file_format)
 
-        # Parse complet (header + data) avec les bons tags
-        # Schéma unifié : measurement = "electrical"
-        points, stats = parser.parse(
-            tsv_file,
-            campaign=campaign_name,
-            bucket_name=bucket_name,
-            table_name="electrical",
-        )
+        # Parse des données avec les bons tags
+        # Schéma unifié : measurement = "electrical", émis en line protocol
+        # Lots encodés bloc par bloc (pas de liste de toutes les lignes)
+        batches, stats = parser.parse_tsv(tsv, campaign=campaign_name, encode=encode_batches)
 
-        logger.info("  Points created: %d", len(points))
+        logger.debug("  Points created: %d", stats["nb_points"])
 
-        file_report["nb_rows"] = stats.get("nb_rows", 0)
-        file_report["nb_channels"] = stats.get("nb_channels", 0)
-        file_report["nb_points"] = stats.get("nb_points", 0)
-        file_report["nb_invalid_timestamps"] = stats.get("nb_invalid_timestamps", 0)
-        file_report["nb_invalid_values"] = stats.get("nb_invalid_values", 0)
+        file_report.update({k: stats.get(k, 0) for k in _STATS_KEYS})
         file_report["channels"] = stats.get("channels", {})
         file_report["file_header_meta"] = stats.get("file_header_meta")
+        file_report["time_start"] = stats.get("time_start")
+        file_report["time_end"] = stats.get("time_end")
 
-        # Écriture Influx
-        write_points(client, bucket_name, org, points)
+        return True, file_report, batches
 
-        # Vérification optionnelle : compter les points dans Influx pour ce fichier
-        try:
-            expected = len(points)
-
-            # Calcule la plage temporelle à partir du TSV (colonne 0)
-            start_time_iso, end_time_iso = _compute_time_range_from_tsv(tsv_file)
-
-            actual = count_points_for_file(
-                client=client,
-                org=org,
-                bucket=bucket_name,
-                campaign=campaign_name,
-                device_master_sn=device_master_sn,
-                start_time=start_time_iso,
-                end_time=end_time_iso,
-            )
+    except Exception as e:
+        msg = str(e)
+        logger.error("  ✗ Error processing %s: %s", tsv_file, msg)
+        file_report["status"] = "error"
+        file_report["error"] = msg
+        return False, file_report, []
 
-            file_report["nb_points_expected"] = expected
-            file_report["nb_points_in_influx"] = actual
-            file_report["time_start"] = start_time_iso
-            file_report["time_end"] = end_time_iso
-
-            if actual >= expected:
-                logger.info(
-                    "  ✓ Vérification Influx OK: %d points attendus, %d trouvés (>=) "
-                    "pour le fichier %s sur [%s ; %s]",
-                    expected,
-                    actual,
-                    Path(tsv_file).name,
-                    start_time_iso,
-                    end_time_iso,
-                )
-            else:
-                logger.warning(
-                    "  ⚠ Vérification Influx INCOMPLETE: %d points attendus, %d trouvés "
-                    "pour le fichier %s sur [%s ; %s]",
-                    expected,
-                    actual,
-                    Path(tsv_file).name,
-                    start_time_iso,
-                    end_time_iso,
+
+def process_tsv_file(
+    tsv_file: str,
+    base_folder: str,
+    client: InfluxDBClient,
+    org: str,
+    parsed: Optional[Tuple[bool, Dict[str, Any], List[bytes]]] = None,
+    write_api: Optional[WriteApi] = None,
+) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Traite un fichier TSV et écrit les points dans InfluxDB.
+
+    `parsed` permet de fournir le résultat de parse_tsv_file déjà calculé
+    (par exemple dans un process worker) ; sinon le fichier est parsé ici.
+
+    `write_api` (optionnel) : WriteApi partagé pour tout le run (cf. main).
+
+    Retourne:
+        (success: bool, file_report: dict)
+    """
+    if parsed is None:
+        parsed = parse_tsv_file(tsv_file, base_folder)
+
+    ok, file_report, batches = parsed
+    if not ok:
+        return False, file_report
+
+    bucket_name = file_report["bucket"]
+    campaign_name = file_report["campaign"]
+    device_master_sn = file_report["device_master_sn"]
+
+    try:
+        # S'assure que le bucket existe (noms en cache côté influx_utils)
+        create_bucket_if_not_exists(client, bucket_name, org)
+
+        # Écriture Influx
+        write_batches(client, bucket_name, org, batches, write_api=write_api)
+
+        # Vérification optionnelle : compter les points dans Influx pour ce
+        # fichier, sur la plage temporelle fournie par le parser (colonne des
+        # timestamps déjà convertie). Sans point écrit (aucun timestamp ou
+        # valeur valide), il n'y a rien à vérifier.
+        expected = file_report["nb_points"]
+        start_time_iso = file_report.get("time_start")
+        end_time_iso = file_report.get("time_end")
+        if expected and start_time_iso is not None and end_time_iso is not None:
+            try:
+                actual = count_points_for_file(
+                    client=client,
+                    org=org,
+                    bucket=bucket_name,
+                    campaign=campaign_name,
+                    device_master_sn=device_master_sn,
+                    start_time=start_time_iso,
+                    end_time=end_time_iso,
                 )
 
-        except Exception as e:
-            logger.warning("Impossible de vérifier les points dans InfluxDB pour %s: %s", tsv_file, e)
+                file_report["nb_points_expected"] = expected
+                file_report["nb_points_in_influx"] = actual
+
+                if actual >= expected:
+                    logger.debug(
+                        "  ✓ Vérification Influx OK: %d points attendus, %d trouvés (>=) "
+                        "pour le fichier %s sur [%s ; %s]",
+                        expected,
+                        actual,
+                        Path(tsv_file).name,
+                        start_time_iso,
+                        end_time_iso,
+                    )
+                else:
+                    logger.warning(
+                        "  ⚠ Vérification Influx INCOMPLETE: %d points attendus, %d trouvés "
+                        "pour le fichier %s sur [%s ; %s]",
+                        expected,
+                        actual,
+                        Path(tsv_file).name,
+                        start_time_iso,
+                        end_time_iso,
+                    )
+
+            except Exception as e:
+                logger.warning("Impossible de vérifier les points dans InfluxDB pour %s: %s", tsv_file, e)
 
         # Publie le catalogue des voies au config API (utilisé par le panel
         # Grafana pour peupler la config sans scanner Influx). Scope bucket :
@@ -325,9 +341,269 @@ def process_tsv_file(
         return False, file_report
 
 
-def write_run_report_to_file(report: Dict[str, Any], base_folder: str) -> None:
+def _prefetch_in_thread(items: Iterable[str], maxsize: int = 32) -> Iterator[str]:
+    """
+    Consomme `items` (ex. le parcours disque de find_tsv_files) dans un thread
+    dédié, via une file bornée : le parcours avance pendant que les fichiers
+    déjà trouvés sont parsés et écrits.
+
+    Une exception levée par le producteur est relancée côté consommateur.
+    """
+    q: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+    done = object()
+    errors: List[BaseException] = []
+
+    def produce() -> None:
+        try:
+            for item in items:
+                q.put(item)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            q.put(done)
+
+    threading.Thread(target=produce, name="tsv-scan", daemon=True).start()
+
+    while True:
+        item = q.get()
+        if item is done:
+            break
+        yield item
+
+    if errors:
+        raise errors[0]
+
+
+# Démarrage des process de parsing sans fork : le process principal a déjà
+# des threads (parcours disque de _prefetch_in_thread, manager du pool) et un
+# fork pourrait hériter d'un verrou tenu par l'un d'eux.
+_PARSE_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+if _PARSE_MP_CONTEXT.get_start_method() == "forkserver":
+    # Le serveur (sans thread) importe une seule fois ce module et ses
+    # dépendances (pandas, pyarrow...) : les workers en héritent au fork
+    _PARSE_MP_CONTEXT.set_forkserver_preload(["tsv_parser"])
+
+
+def _failed_parse(tsv_file: str, error: BaseException) -> Tuple[bool, Dict[str, Any], List[bytes]]:
+    """
+    Résultat de parsing en échec pour un fichier dont le worker a échoué.
+    """
+    logger.error("  ✗ Error processing %s: %s", tsv_file, error)
+    file_report = _new_file_report(tsv_file)
+    file_report["error"] = str(error) or type(error).__name__
+    return False, file_report, []
+
+
+def _submit_parse(executor: ProcessPoolExecutor, tsv_file: str, base_folder: str) -> Future:
+    """
+    Soumet le parsing d'un fichier au pool. Si le pool est déjà cassé, le
+    Future retourné porte l'erreur BrokenProcessPool (traitée à la lecture).
+    """
+    try:
+        return executor.submit(parse_tsv_file, tsv_file, base_folder)
+    except BrokenProcessPool as e:
+        future: Future = Future()
+        future.set_exception(e)
+        return future
+
+
+def _parse_result(tsv_file: str, future: Future) -> Tuple[bool, Dict[str, Any], List[bytes]]:
     """
-    Écrit un rapport JSON d'exécution sur disque.
+    Résultat d'un parsing terminé (en échec si le worker a levé une erreur).
+    """
+    try:
+        return future.result()
+    except Exception as e:
+        return _failed_parse(tsv_file, e)
+
+
+def _parse_in_new_process(tsv_file: str, base_folder: str) -> Tuple[bool, Dict[str, Any], List[bytes]]:
+    """
+    Reparse un fichier seul, dans un process neuf : si ce process meurt à son
+    tour, c'est ce fichier qui tue son worker, et lui seul est en erreur.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=_PARSE_MP_CONTEXT) as executor:
+        try:
+            return executor.submit(parse_tsv_file, tsv_file, base_folder).result()
+        except Exception as e:
+            return _failed_parse(tsv_file, e)
+
+
+def _iter_parsed_files(
+    tsv_files: Iterable[str],
+    base_folder: str,
+    workers: int,
+) -> Iterator[Tuple[str, Tuple[bool, Dict[str, Any], List[bytes]]]]:
+    """
+    Parse les fichiers et les restitue dans l'ordre, avec le résultat de
+    parse_tsv_file.
+
+    Si workers > 1, le parsing (CPU) est réparti sur un pool de process ;
+    l'appelant reste l'unique écrivain InfluxDB (le client n'est pas
+    fork-safe et reste dans le process principal). Au plus 2 * workers
+    fichiers parsés sont gardés en mémoire en attente d'écriture.
+
+    Si un worker meurt (OOM, signal...), le pool est cassé et tous les
+    fichiers en cours échouent avec lui : ceux-ci sont reparsés un par un
+    dans un process neuf (cf. _parse_in_new_process), pour ne marquer en
+    erreur que le fichier fautif, puis un nouveau pool reprend la suite.
+    """
+    if workers <= 1:
+        for tsv_file in tsv_files:
+            yield tsv_file, parse_tsv_file(tsv_file, base_folder)
+        return
+
+    files_iter = iter(tsv_files)
+    pending: Deque[Tuple[str, Future]] = deque()
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=_PARSE_MP_CONTEXT)
+    try:
+        while True:
+            while len(pending) < 2 * workers:
+                tsv_file = next(files_iter, None)
+                if tsv_file is None:
+                    break
+                pending.append((tsv_file, _submit_parse(executor, tsv_file, base_folder)))
+            if not pending:
+                return
+
+            tsv_file, future = pending[0]
+            try:
+                parsed = future.result()
+            except BrokenProcessPool as e:
+                logger.warning(
+                    "Worker de parsing mort (%s) : %d fichiers en cours reparsés un par un",
+                    e,
+                    len(pending),
+                )
+                executor.shutdown(wait=True)
+                while pending:
+                    tsv_file, future = pending.popleft()
+                    if future.done() and not isinstance(future.exception(), BrokenProcessPool):
+                        yield tsv_file, _parse_result(tsv_file, future)
+                    else:
+                        yield tsv_file, _parse_in_new_process(tsv_file, base_folder)
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=_PARSE_MP_CONTEXT)
+                continue
+            except Exception as e:
+                parsed = _failed_parse(tsv_file, e)
+            pending.popleft()
+            yield tsv_file, parsed
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _write_and_archive(
+    tsv_file: str,
+    base_folder: str,
+    client: InfluxDBClient,
+    org: str,
+    parsed: Tuple[bool, Dict[str, Any], List[bytes]],
+    write_api: Optional[WriteApi] = None,
+) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Écrit un fichier déjà parsé dans InfluxDB puis le déplace dans parsed/
+    (succès) ou error/ (échec).
+    """
+    ok, file_report = process_tsv_file(
+        tsv_file, base_folder, client, org, parsed=parsed, write_api=write_api
+    )
+
+    if ok:
+        # Fichier traité avec succès -> on le déplace dans parsed/
+        try:
+            move_parsed_file(tsv_file)
+        except Exception as e:
+            logger.warning(
+                "Impossible de déplacer le fichier traité vers 'parsed/': %s", e
+            )
+    else:
+        # Erreur de traitement -> on le déplace dans error/
+        try:
+            move_error_file(tsv_file)
+        except Exception as e:
+            logger.warning(
+                "Impossible de déplacer le fichier en erreur vers 'error/': %s", e
+            )
+
+    return ok, file_report
+
+
+def _iter_written_files(
+    parsed_files: Iterable[Tuple[str, Tuple[bool, Dict[str, Any], List[bytes]]]],
+    base_folder: str,
+    client: InfluxDBClient,
+    org: str,
+    workers: int,
+    write_api: Optional[WriteApi] = None,
+) -> Iterator[Tuple[bool, Dict[str, Any]]]:
+    """
+    Écrit les fichiers parsés (cf. _write_and_archive) et restitue, dans
+    l'ordre, (success, file_report).
+
+    Si workers > 1, les écritures (I/O réseau) sont faites par un pool de
+    threads partageant le client InfluxDB et le WriteApi (synchrone, sans
+    état) ; au plus 2 * workers fichiers sont en cours d'écriture.
+    """
+    if workers <= 1:
+        for tsv_file, parsed in parsed_files:
+            yield _write_and_archive(tsv_file, base_folder, client, org, parsed, write_api)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tsv-write") as executor:
+        pending: Deque[Tuple[str, Future]] = deque()
+
+        def collect() -> Tuple[bool, Dict[str, Any]]:
+            tsv_file, future = pending.popleft()
+            try:
+                return future.result()
+            except Exception as e:
+                logger.error("  ✗ Error processing %s: %s", tsv_file, e)
+                file_report = _new_file_report(tsv_file)
+                file_report["error"] = str(e)
+                return False, file_report
+
+        for tsv_file, parsed in parsed_files:
+            pending.append((
+                tsv_file,
+                executor.submit(
+                    _write_and_archive, tsv_file, base_folder, client, org, parsed, write_api
+                ),
+            ))
+            # Le résultat d'un parse est libéré dès que son écriture est terminée
+            if len(pending) >= 2 * workers:
+                yield collect()
+
+        while pending:
+            yield collect()
+
+
+def _dry_run_results(
+    parsed_files: Iterable[Tuple[str, Tuple[bool, Dict[str, Any], List[bytes]]]],
+) -> Iterator[Tuple[bool, Dict[str, Any]]]:
+    """
+    Résultats en mode dry-run : rapport de parsing, sans écriture ni déplacement.
+    """
+    for _tsv_file, (ok, file_report, _batches) in parsed_files:
+        if ok:
+            file_report["status"] = "success"
+            logger.debug("  Points that would be created: %d", file_report["nb_points"])
+        yield ok, file_report
+
+
+def _dump_json(obj: Any) -> bytes:
+    """
+    Sérialise un rapport en JSON indenté (UTF-8), via orjson si disponible.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def write_run_report_to_file(report: Dict[str, Any], base_folder: str, run_id: str) -> None:
+    """
+    Écrit un rapport JSON d'exécution sur disque, nommé d'après run_id.
 
     Le chemin de base peut être configuré via la variable d'env TSV_REPORT_DIR,
     sinon on utilise <base_folder>/../logs/reports.
@@ -341,13 +617,11 @@ def write_run_report_to_file(report: Dict[str, Any], base_folder: str) -> None:
 
     reports_dir.mkdir(parents=True, exist_ok=True)
 
-    run_id = report.get("run_id", datetime.now(timezone.utc).isoformat())
     safe_run_id = run_id.replace(":", "-")
     filename = f"tsv_parser_{safe_run_id}.json"
     path = reports_dir / filename
 
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(report, f, ensure_ascii=False, indent=2)
+    path.write_bytes(_dump_json(report))
 
     logger.info("Rapport d'exécution écrit dans: %s", path)
 
@@ -356,16 +630,41 @@ def write_run_report_to_file(report: Dict[str, Any], base_folder: str) -> None:
 # main
 # ---------------------------------------------------------------------------
 
-def main():
+def _positive_int(value: str) -> int:
     """
-    Main function to process TSV files recursively.
+    Type argparse des options de nombre de workers : entier > 0.
     """
-    setup_logging()
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"entier > 0 attendu : {value!r}")
+    return number
+
+
+def _get_workers_from_env(name: str, default: int) -> int:
+    """
+    Nombre de workers lu dans la variable d'environnement `name` : une valeur
+    non entière ou <= 0 est ignorée (warning) au profit de `default`.
+    """
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        workers = int(raw)
+    except ValueError:
+        workers = 0
+    if workers <= 0:
+        logger.warning("%s invalide (%r) : entier > 0 attendu, utilisation de %d", name, raw, default)
+        return default
+    return workers
 
-    logger.info("=" * 70)
-    logger.info("TSV to InfluxDB2 Parser")
-    logger.info("=" * 70)
 
+def main():
+    """
+    Main function to process TSV files recursively.
+    """
     parser = argparse.ArgumentParser()
     parser.add_argument("-d", "--dataFolder", help="Path to the data folder (ex: /srv/powerview/data)")
     parser.add_argument("-t", "--tsvFile", help="Path to the TSV file(s)")
@@ -377,45 +676,75 @@ def main():
             "ne pas sauvegarder le rapport, mais afficher le rapport JSON sur stdout."
         ),
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=_positive_int,
+        help="Nombre de process de parsing (défaut : TSV_PARSE_WORKERS, sinon le nombre de CPU)",
+    )
+    parser.add_argument(
+        "--writeWorkers",
+        type=_positive_int,
+        help="Nombre de threads d'écriture InfluxDB (défaut : TSV_WRITE_WORKERS, sinon 4)",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Détail du traitement de chaque fichier (logs DEBUG)",
+    )
     args = parser.parse_args()
 
+    setup_logging(verbose=args.verbose)
+
+    logger.info("=" * 70)
+    logger.info("TSV to InfluxDB2 Parser")
+    logger.info("=" * 70)
+
     # Validation : --tsvFile nécessite obligatoirement --dataFolder
     if args.tsvFile and not args.dataFolder:
         parser.error("--dataFolder est obligatoire quand --tsvFile est utilisé")
 
-    tsv_files: List[str] = []
+    tsv_files: Iterable[str] = []
     base_folder: str = ""
+    # Priorité : option CLI, puis variable d'environnement, puis défaut
+    workers = args.workers or _get_workers_from_env("TSV_PARSE_WORKERS", os.cpu_count() or 1)
+    write_workers = args.writeWorkers or _get_workers_from_env("TSV_WRITE_WORKERS", 4)
 
-    if args.tsvFile and args.dataFolder:
+    if args.dataFolder:
         base_folder = args.dataFolder
-        if not os.path.exists(base_folder):
+        if not os.path.isdir(base_folder):
             logger.error("Error: Folder '%s' does not exist.", base_folder)
             sys.exit(1)
+
+    if args.tsvFile and args.dataFolder:
         logger.info("Using data folder: %s", base_folder)
 
         tsv_files = [args.tsvFile]
         logger.info("Using specified TSV files: %s", tsv_files)
+        # Un seul fichier : inutile de démarrer des pools de process / threads
+        workers = 1
+        write_workers = 1
 
     elif args.dataFolder and not args.tsvFile:
-        base_folder = args.dataFolder
-        if not os.path.exists(base_folder):
-            logger.error("Error: Folder '%s' does not exist.", base_folder)
-            sys.exit(1)
         logger.info("Using all TSV files in folder: %s", base_folder)
-        tsv_files = find_tsv_files(base_folder)
+        # Parcours du disque en tâche de fond : le traitement démarre dès
+        # les premiers fichiers trouvés
+        tsv_files = _prefetch_in_thread(find_tsv_files(base_folder))
 
-    if not tsv_files:
+    else:
         logger.info("No TSV files found to process.")
         return
 
-    logger.info("Found %d TSV file(s) to process.", len(tsv_files))
-
     client: Any = None
     org: str = ""
+    write_api: Optional[WriteApi] = None
 
     if not args.dry_run:
         try:
             client, org = setup_influxdb_client()
+            # Un seul WriteApi pour tout le run, partagé par les threads d'écriture
+            write_api = client.write_api(write_options=SYNCHRONOUS)
             logger.info("Connected to InfluxDB at %s", os.getenv("INFLUXDB_HOST"))
         except Exception as e:
             logger.error("Error connecting to InfluxDB: %s", e)
@@ -423,16 +752,16 @@ def main():
     else:
         logger.info("Mode DRY-RUN : aucune connexion à InfluxDB ne sera effectuée.")
 
-    run_id = datetime.now(timezone.utc).isoformat()
-    start_time = time.time()
+    run_start = datetime.now(timezone.utc)
+    run_id = run_start.isoformat()
 
     run_report: Dict[str, Any] = {
         "run_id": run_id,
-        "start_time": datetime.now(timezone.utc).isoformat(),
+        "start_time": run_id,
         "end_time": None,
         "duration_s": None,
         "base_folder": base_folder,
-        "nb_files_total": len(tsv_files),
+        "nb_files_total": 0,
         "nb_files_success": 0,
         "nb_files_failed": 0,
         "nb_points_total": 0,
@@ -444,96 +773,34 @@ def main():
     successful = 0
     failed = 0
 
-    for tsv_file in tsv_files:
-        if args.dry_run:
-            logger.info("Processing (dry-run): %s", tsv_file)
-            file_report: Dict[str, Any] = {
-                "file_path": tsv_file,
-                "bucket": None,
-                "campaign": None,
-                "device_master_sn": None,
-                "status": "success",
-                "error": None,
-                "nb_rows": 0,
-                "nb_channels": 0,
-                "nb_points": 0,
-                "nb_invalid_timestamps": 0,
-                "nb_invalid_values": 0,
-                "channels": {},
-                "file_header_meta": None,
-                "nb_points_expected": None,
-                "nb_points_in_influx": None,
-                "time_start": None,
-                "time_end": None,
-            }
-
-            try:
-                bucket_name, campaign_name, device_master_sn = _extract_path_components(
-                    tsv_file, base_folder
-                )
-                file_report["bucket"] = bucket_name
-                file_report["campaign"] = campaign_name
-                file_report["device_master_sn"] = device_master_sn
-
-                # Lecture du header pour récupérer format + mappings
-                channel_mappings, file_format = parse_tsv_header(tsv_file)
-                logger.info("  Bucket: %s", bucket_name)
-                logger.info("  Campaign: %s", campaign_name)
-                logger.info("  Master device: %s", device_master_sn)
-                logger.info("  Channels: %d", len(channel_mappings))
-                logger.info("  File format: %s", file_format)
-
-                parser_impl = TSVParserFactory.get_parser(file_format)
-
-                _, stats = parser_impl.parse(
-                    tsv_file,
-                    campaign=campaign_name,
-                    bucket_name=bucket_name,
-                    table_name="electrical",
-                )
-
-                file_report["nb_rows"] = stats.get("nb_rows", 0)
-                file_report["nb_channels"] = stats.get("nb_channels", 0)
-                file_report["nb_points"] = stats.get("nb_points", 0)
-                file_report["nb_invalid_timestamps"] = stats.get("nb_invalid_timestamps", 0)
-                file_report["nb_invalid_values"] = stats.get("nb_invalid_values", 0)
-                file_report["channels"] = stats.get("channels", {})
-                file_report["file_header_meta"] = stats.get("file_header_meta")
-
-                logger.info("  Points that would be created: %d", file_report["nb_points"])
-                successful += 1
-                run_report["nb_points_total"] += file_report.get("nb_points", 0)
-            except Exception as e:
-                msg = str(e)
-                logger.error("  ✗ Error processing (dry-run) %s: %s", tsv_file, msg)
-                file_report["status"] = "error"
-                file_report["error"] = msg
-                failed += 1
+    parsed_files = _iter_parsed_files(tsv_files, base_folder, workers)
+    if args.dry_run:
+        results = _dry_run_results(parsed_files)
+    else:
+        results = _iter_written_files(
+            parsed_files, base_folder, client, org, write_workers, write_api=write_api
+        )
 
+    aborted = False
+    try:
+        for ok, file_report in results:
             run_report["files"].append(file_report)
-        else:
-            ok, file_report = process_tsv_file(tsv_file, base_folder, client, org)
-            run_report["files"].append(file_report)
-
             if ok:
                 successful += 1
                 run_report["nb_points_total"] += file_report.get("nb_points", 0)
-                # Fichier traité avec succès -> on le déplace dans parsed/
-                try:
-                    move_parsed_file(tsv_file)
-                except Exception as e:
-                    logger.warning(
-                        "Impossible de déplacer le fichier traité vers 'parsed/': %s", e
-                    )
             else:
                 failed += 1
-                # Erreur de traitement -> on le déplace dans error/
-                try:
-                    move_error_file(tsv_file)
-                except Exception as e:
-                    logger.warning(
-                        "Impossible de déplacer le fichier en erreur vers 'error/': %s", e
-                    )
+    except Exception as e:
+        # Erreur inattendue en cours de run : les fichiers restants sont
+        # laissés en place, le rapport des fichiers traités est tout de même écrit
+        logger.error("Traitement interrompu : %s", e)
+        aborted = True
+
+    if successful + failed == 0 and not aborted:
+        logger.info("No TSV files found to process.")
+        if client is not None:
+            client.close()
+        return
 
     logger.info("=" * 70)
     logger.info("Processing complete!")
@@ -541,22 +808,26 @@ def main():
     logger.info("  Failed: %d", failed)
     logger.info("=" * 70)
 
-    end_time = time.time()
-    run_report["end_time"] = datetime.now(timezone.utc).isoformat()
-    run_report["duration_s"] = end_time - start_time
+    run_end = datetime.now(timezone.utc)
+    run_report["end_time"] = run_end.isoformat()
+    run_report["duration_s"] = (run_end - run_start).total_seconds()
+    run_report["nb_files_total"] = successful + failed
     run_report["nb_files_success"] = successful
     run_report["nb_files_failed"] = failed
-    run_report["status"] = "success" if failed == 0 else "partial_failure"
+    if aborted:
+        run_report["status"] = "aborted"
+    else:
+        run_report["status"] = "success" if failed == 0 else "partial_failure"
 
     if args.dry_run:
         print(
             "\n=== DRY RUN REPORT (aucune écriture InfluxDB, aucun renommage de fichier, "
             "aucun rapport sur disque) ==="
         )
-        print(json.dumps(run_report, ensure_ascii=False, indent=2))
+        print(_dump_json(run_report).decode("utf-8"))
     else:
         try:
-            write_run_report_to_file(run_report, base_folder)
+            write_run_report_to_file(run_report, base_folder, run_id)
         except Exception as e:
             logger.warning("Impossible d'écrire le rapport JSON: %s", e)
 